@@ -1,14 +1,24 @@
+import time
+_startup_began = time.perf_counter()
 import os
+import base64
+import hashlib
+import json
+import tempfile
 import logging
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, url_for, g, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-from chemistry_utils import predict_reaction, get_mol_svg, get_common_alcohols, get_catalysts, get_reaction_types
+from metrics import STAGE_SECONDS, REQUEST_SECONDS, PREDICTIONS, ERRORS, register_collector, render as render_metrics
 from datetime import datetime
+import startup
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# chemistry_utils (and with it RDKit) is imported on first use or by the warm-up
+startup.record_phase('imports', time.perf_counter() - _startup_began)
+
+# Configure logging; DEBUG formatting is expensive on the hot path, so it is opt-in
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 class Base(DeclarativeBase):
     pass
@@ -26,6 +36,8 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+# Store one row per distinct reaction and count repeats instead of appending duplicates
+app.config["HISTORY_DEDUPE"] = os.environ.get("HISTORY_DEDUPE", "true").lower() != "false"
 
 # Initialize the app with the extension
 db.init_app(app)
@@ -37,13 +49,283 @@ def create_tables():
             # Make sure to import the models here or their tables won't be created
             import models  # noqa: F401
             db.create_all()
+            # create_all skips columns and indexes on tables that already exist
+            table = models.Reaction.__table__
+            existing = {column['name'] for column in db.inspect(db.engine).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    with db.engine.begin() as connection:
+                        connection.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+            from search import backfill_fingerprints, create_search_index
+            create_search_index(db.engine, table.name)
+            backfilled = backfill_fingerprints(models.Reaction, db.session)
+            if backfilled:
+                logging.info(f"Backfilled search fingerprints for {backfilled} reactions")
+            # Rows saved before deduplication have no hash, so the upsert would never match them
+            if app.config["HISTORY_DEDUPE"]:
+                hashed, merged = models.backfill_content_hashes(db.session)
+                if hashed or merged:
+                    logging.info(f"Backfilled content hashes for {hashed} reactions, merged {merged} duplicates")
             logging.info("Database tables created successfully")
+            return True
     except Exception as e:
         logging.error(f"Error creating database tables: {e}")
-        # Don't fail the app startup if DB is temporarily unavailable
+        return False
+
+# Schema changes are an explicit deploy step so worker start-up never waits on the database
+@app.cli.command('create-tables')
+def create_tables_command():
+    """Create missing tables, columns and indexes"""
+    if not create_tables():
+        raise SystemExit(1)
+
+# Saved reactions are written in batches off the request thread unless disabled
+history_writer = None
+if os.environ.get("HISTORY_WRITE_BEHIND", "true").lower() != "false":
+    from history_writer import HistoryWriter
+    history_writer = HistoryWriter(
+        app, db,
+        batch_size=int(os.environ.get("HISTORY_BATCH_SIZE", 100)),
+        flush_interval=float(os.environ.get("HISTORY_FLUSH_INTERVAL", 1.0)),
+        max_backlog=int(os.environ.get("HISTORY_MAX_BACKLOG", 10000))
+    )
+
+# Computed results awaiting a save, referenced by the token /predict returns
+# Tokens are shared through SQLite by default so a save can reach any worker
+from caching import FileStore, SQLiteStore
+from result_tokens import ResultTokenStore
+_result_token_dir = os.environ.get("RESULT_TOKEN_DIR")
+_result_token_path = os.environ.get(
+    "RESULT_TOKEN_PATH", os.path.join(tempfile.gettempdir(), "chemreact_result_tokens.sqlite3"))
+if _result_token_dir:
+    _result_token_store = FileStore(_result_token_dir, suffix='.json')
+elif _result_token_path:
+    _result_token_store = SQLiteStore(_result_token_path, table='result_tokens')
+else:
+    _result_token_store = None
+result_tokens = ResultTokenStore(
+    ttl=int(os.environ.get("RESULT_TOKEN_TTL", 900)),
+    max_entries=int(os.environ.get("RESULT_TOKEN_MAX_ENTRIES", 10000)),
+    store=_result_token_store
+)
+
+# Live RDKit work can run in a bounded process pool so a slow molecule costs
+# its own request a timeout instead of blocking the serving worker
+from offload import BoundedProcessPool, Overloaded, WorkTimeout
+offload_pool = None
+if os.environ.get("PREDICT_OFFLOAD", "false").lower() == "true":
+    offload_pool = BoundedProcessPool(
+        max_workers=int(os.environ.get("PREDICT_WORKERS", 0)) or None,
+        max_pending=int(os.environ.get("PREDICT_MAX_PENDING", 0)) or None,
+        timeout=float(os.environ.get("PREDICT_TIMEOUT", 10))
+    )
+
+def run_prediction(compound, catalyst, reaction_type, inline_svg=False):
+    """Serve dropdown combinations from the precomputed table, free-form input live"""
+    from chemistry_utils import build_prediction, check_compound
+    from prediction_table import lookup as lookup_prediction
+    result = lookup_prediction(compound, catalyst, reaction_type)
+    if result is not None:
+        return result
+    error = check_compound(compound)
+    if error:
+        return {'success': False, 'error': error}
+    # Inline SVG is only rendered when the client asked for it
+    if offload_pool is not None:
+        return offload_pool.run(build_prediction, compound, catalyst, reaction_type, inline_svg)
+    return build_prediction(compound, catalyst, reaction_type, render_svg=inline_svg)
+
+def offload_error_response(error):
+    """Map a rejected or timed-out offload task to a JSON error response"""
+    ERRORS.inc(endpoint=request.endpoint, kind='overloaded' if isinstance(error, Overloaded) else 'timeout')
+    if isinstance(error, Overloaded):
+        response = jsonify({
+            'success': False,
+            'error': 'The server is busy. Please try again shortly.'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    return jsonify({
+        'success': False,
+        'error': 'This molecule took too long to process.'
+    }), 504
+
+def reaction_values(compound, catalyst, reaction_type, result):
+    """Build the Reaction row for a successful prediction"""
+    from chemistry_utils import COMMON_ALCOHOLS, resolve_compound
+    from models import reaction_content_hash
+    _, canonical_smiles = resolve_compound(compound)
+    return dict(
+        reactant=compound,
+        reactant_smiles=COMMON_ALCOHOLS.get(compound, canonical_smiles),
+        catalyst=catalyst,
+        reaction_type=reaction_type,
+        product=result['product'],
+        product_smiles=result['product'],
+        details=result['reaction_details'],
+        content_hash=reaction_content_hash(canonical_smiles, catalyst, reaction_type)
+    )
+
+def save_reaction_values(values):
+    """Persist a Reaction row; returns an error message or None"""
+    from models import save_reactions
+    from search import reaction_fingerprints
+    values = dict(values, created_at=datetime.utcnow(), **reaction_fingerprints(values))
+    if history_writer is not None:
+        if not history_writer.submit(**values):
+            return 'Too many pending saves. Please try again shortly.'
+        index_saved_product(values)
+        return None
+    try:
+        with STAGE_SECONDS.time(stage='db_save'):
+            save_reactions([values], dedupe=app.config["HISTORY_DEDUPE"])
+            db.session.commit()
+        logging.info(f"Saved reaction to database: {values['reactant']} + {values['catalyst']} ({values['reaction_type']})")
+    except Exception as db_error:
+        logging.error(f"Error saving to database: {str(db_error)}")
+        db.session.rollback()
+        return 'The reaction could not be saved. Please try again.'
+    index_saved_product(values)
+    return None
+
+def index_saved_product(values):
+    """Make a saved product findable by /similar; indexing errors never fail the save"""
+    try:
+        from similarity import add_reaction
+        add_reaction(values)
+    except Exception as e:
+        logging.error(f"Error indexing saved product: {str(e)}")
+
+# Serialized GET /predict responses shared by every worker through SQLite
+from caching import LRUCache, SQLiteStore
+from prediction_version import PREDICTION_CACHE_VERSION
+PREDICTION_CACHE_MAX_AGE = int(os.environ.get("PREDICTION_CACHE_MAX_AGE", 86400))
+_response_cache_path = os.environ.get(
+    "RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "chemreact_response_cache.sqlite3"))
+response_cache = LRUCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 2048)),
+    max_bytes=int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    store=SQLiteStore(
+        _response_cache_path, table='predict_responses',
+        max_entries=int(os.environ.get("RESPONSE_CACHE_STORE_MAX_ENTRIES", 50000)),
+        max_bytes=int(os.environ.get("RESPONSE_CACHE_STORE_MAX_BYTES", 256 * 1024 * 1024))
+    ) if _response_cache_path else None
+)
+if response_cache.store is not None:
+    # Entries from previous code versions are never read again
+    response_cache.store.prune(int(os.environ.get("RESPONSE_CACHE_RETENTION", 7 * 86400)))
+
+def prediction_cache_key(compound, catalyst, reaction_type, inline_svg=False):
+    """Canonical cache key for a prediction query: spellings of one structure share an entry"""
+    from chemistry_utils import resolve_compound
+    _, canonical_smiles = resolve_compound(compound)
+    return (f"{PREDICTION_CACHE_VERSION}|{canonical_smiles or compound}|{catalyst.lower()}|{reaction_type}|"
+            f"{'inline' if inline_svg else 'url'}")
+
+def echo_inputs(body, compound, catalyst):
+    """Point a cached body at this request's spelling of the compound and catalyst"""
+    # Most hits repeat the spelling that filled the entry, so skip the parse when both already match
+    if all(f'"{name}": {json.dumps(value, ensure_ascii=False)}' in body
+           for name, value in (('reactant', compound), ('catalyst', catalyst))):
+        return body
+    result = json.loads(body)
+    result.update(reactant=compound, catalyst=catalyst)
+    return json.dumps(result, ensure_ascii=False, sort_keys=True)
+
+def with_depiction_urls(result, inline_svg=False):
+    """Replace inline SVG documents with URLs of cacheable depiction assets"""
+    from depictions import depiction_params
+    result = dict(result)
+    if not inline_svg:
+        result.pop('reactant_svg', None)
+        result.pop('product_svg', None)
+    for role, compound in (('reactant', result.get('reactant')), ('product', result.get('product'))):
+        params = depiction_params(compound) if compound else None
+        result[f'{role}_svg_url'] = url_for('depict', fmt='svg', **params) if params else None
+    return result
+
+def with_descriptors(result):
+    """Attach reactant and product descriptors to a successful prediction"""
+    from descriptors import prediction_descriptors
+    return dict(result, descriptors=prediction_descriptors(result['reactant'], result['product']))
+
+def metric_label(value, known):
+    """Map free-form input onto a known label value so metric cardinality stays bounded"""
+    value = (value or '').lower()
+    return value if value in known else 'other'
+
+def count_prediction(catalyst, reaction_type, outcome):
+    """Count a served prediction by reaction type, catalyst and outcome"""
+    from chemistry_utils import CATALYSTS, REACTION_TYPES
+    PREDICTIONS.inc(
+        reaction_type=metric_label(reaction_type, REACTION_TYPES),
+        catalyst=metric_label(catalyst, CATALYSTS),
+        outcome=outcome
+    )
 
-# Initialize tables
-create_tables()
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+def collect_runtime_metrics():
+    """Cache, offload and write-behind counters sampled at scrape time"""
+    from chemistry_utils import SUBSTRATE_CLASSES, SVG_CACHE, get_registry_stats
+    from depictions import DEPICTION_ASSETS, DEPICTION_INDEX
+    from descriptors import get_descriptor_cache_stats
+    from pathways import get_pathway_cache_stats
+    registry = get_registry_stats()
+    caches = {
+        'response': response_cache.stats(),
+        'svg': SVG_CACHE.stats(),
+        'depiction_assets': DEPICTION_ASSETS.stats(),
+        'depiction_index': DEPICTION_INDEX.stats(),
+        'molecule_aliases': registry['aliases'],
+        'molecules': registry['molecules'],
+        'substrate_classes': SUBSTRATE_CLASSES.stats(),
+        'pathway_expansions': get_pathway_cache_stats(),
+        'descriptors': get_descriptor_cache_stats(),
+        'result_tokens': result_tokens.stats()
+    }
+    yield ('chemreact_cache_hits_total', 'counter', 'Cache hits by cache',
+           [({'cache': name}, stats['hits']) for name, stats in caches.items()])
+    yield ('chemreact_cache_misses_total', 'counter', 'Cache misses by cache',
+           [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+    yield ('chemreact_cache_evictions_total', 'counter', 'Cache evictions by cache',
+           [({'cache': name}, stats['evictions']) for name, stats in caches.items()])
+    yield ('chemreact_cache_hit_ratio', 'gauge', 'Cache hit ratio since start by cache',
+           [({'cache': name}, stats['hit_ratio']) for name, stats in caches.items()])
+    yield ('chemreact_cache_entries', 'gauge', 'Entries held in memory by cache',
+           [({'cache': name}, stats['entries']) for name, stats in caches.items()])
+    yield ('chemreact_molecule_parses_total', 'counter', 'SMILES parsed by RDKit',
+           [({}, registry['parses'])])
+    if offload_pool is not None:
+        stats = offload_pool.stats()
+        yield ('chemreact_offload_tasks_total', 'counter', 'Offload pool tasks by outcome',
+               [({'outcome': outcome}, stats[outcome]) for outcome in ('completed', 'rejected', 'timeouts')])
+    if history_writer is not None:
+        stats = history_writer.stats()
+        yield ('chemreact_history_rows_total', 'counter', 'Saved reactions handled by the write-behind queue',
+               [({'outcome': outcome}, stats[outcome]) for outcome in ('submitted', 'written', 'rejected', 'failed')])
+        yield ('chemreact_history_backlog', 'gauge', 'Saved reactions waiting to be written',
+               [({}, stats['backlog'])])
+
+register_collector(collect_runtime_metrics)
 
 # Routes
 @app.route('/')
@@ -52,12 +334,14 @@ def index():
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    from chemistry_utils import normalize_compound
     try:
         # Get form data
-        compound = request.form.get('compound', '').strip().lower()
+        compound = normalize_compound(request.form.get('compound', ''))
         catalyst = request.form.get('catalyst', '')
         reaction_type = request.form.get('reaction_type', '')
         save_to_db = request.form.get('save_to_db') == 'true'
+        inline_svg = request.form.get('inline_svg') == 'true'
         
         if not compound:
             return jsonify({
@@ -65,61 +349,382 @@ def predict():
                 'error': 'Please enter a compound'
             })
         
-        # Use common alcohols lookup directly to avoid SMILES parsing errors
-        from chemistry_utils import COMMON_ALCOHOLS
-        if compound in COMMON_ALCOHOLS:
-            reactant_smiles = COMMON_ALCOHOLS[compound]
-        else:
-            reactant_smiles = compound  # Assume direct SMILES input
-        
-        # Predict reaction
-        result = predict_reaction(compound, catalyst, reaction_type)
+        result = run_prediction(compound, catalyst, reaction_type, inline_svg)
+        count_prediction(catalyst, reaction_type, 'success' if result['success'] else 'failure')
         
         if not result['success']:
             return jsonify(result)
-            
-        # Get molecule visualizations
-        # Use SMILES directly if available to avoid parsing errors
-        if compound in COMMON_ALCOHOLS:
-            reactant_svg = get_mol_svg(reactant_smiles)
-        else:
-            reactant_svg = get_mol_svg(compound)
-            
-        product_svg = get_mol_svg(result['product']) if result['product'] else ''
+        
+        values = reaction_values(compound, catalyst, reaction_type, result)
         
         # Save to database if requested
         if save_to_db:
-            try:
-                from models import Reaction
-                reaction = Reaction(
-                    reactant=compound,
-                    reactant_smiles=reactant_smiles if compound in COMMON_ALCOHOLS else None,
-                    catalyst=catalyst,
-                    reaction_type=reaction_type,
-                    product=result['product'],
-                    product_smiles=result['product'],
-                    details=result['details']
-                )
-                db.session.add(reaction)
-                db.session.commit()
-                logging.info(f"Saved reaction to database: {reaction}")
-            except Exception as db_error:
-                logging.error(f"Error saving to database: {str(db_error)}")
-                db.session.rollback()
+            error = save_reaction_values(values)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': error
+                })
+        
+        result = with_descriptors(with_depiction_urls(result, inline_svg))
+        result['result_token'] = result_tokens.issue(values)
+        return jsonify(result)
+        
+    except (Overloaded, WorkTimeout) as e:
+        return offload_error_response(e)
+    except Exception as e:
+        logging.error(f"Error in prediction: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+@app.route('/predict', methods=['GET'])
+def predict_cached():
+    """Cacheable variant of /predict: the response depends only on the query"""
+    from chemistry_utils import normalize_compound
+    compound = normalize_compound(request.args.get('compound', ''))
+    catalyst = request.args.get('catalyst', '')
+    reaction_type = request.args.get('reaction_type', '')
+    inline_svg = request.args.get('inline_svg') == 'true'
+    
+    if not compound:
+        return jsonify({
+            'success': False,
+            'error': 'Please enter a compound'
+        }), 400
+    
+    key = prediction_cache_key(compound, catalyst, reaction_type, inline_svg)
+    body = response_cache.get(key)
+    if body is not None:
+        count_prediction(catalyst, reaction_type, 'cached')
+        body = echo_inputs(body, compound, catalyst)
+    else:
+        try:
+            # Computed with the lower-cased catalyst so the body only depends on the key
+            result = run_prediction(compound, catalyst.lower(), reaction_type, inline_svg)
+            count_prediction(catalyst, reaction_type, 'success' if result['success'] else 'failure')
+            if result['success']:
+                result = with_descriptors(with_depiction_urls(result, inline_svg))
+        except (Overloaded, WorkTimeout) as e:
+            # Not cached: the same query may well succeed once the pool drains
+            return offload_error_response(e)
+        except Exception as e:
+            logging.error(f"Error in prediction: {str(e)}")
+            ERRORS.inc(endpoint=request.endpoint, kind='exception')
+            return jsonify({
+                'success': False,
+                'error': f'An error occurred: {str(e)}'
+            })
+        # Failures aren't cached: they are cheap to recompute and would let junk queries fill the store
+        if result['success']:
+            result['catalyst'] = catalyst
+            body = json.dumps(result, ensure_ascii=False, sort_keys=True)
+            response_cache.set(key, body)
+        else:
+            body = json.dumps(result, ensure_ascii=False, sort_keys=True)
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.sha256(f"{key}|{body}".encode('utf-8')).hexdigest()[:32])
+    response.cache_control.public = True
+    response.cache_control.max_age = PREDICTION_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+def render_runner(fn, *args):
+    """Render in the offload pool, bounded by the depiction time budget"""
+    if offload_pool is None:
+        return fn(*args)
+    from guardrails import DEPICTION_TIME_BUDGET
+    return offload_pool.run(fn, *args, timeout=DEPICTION_TIME_BUDGET)
+
+DEPICTION_MAX_AGE = 365 * 86400
+DEPICTION_MIMETYPES = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+@app.route('/depict/<depiction_id>.<fmt>', methods=['GET'])
+def depict(depiction_id, fmt):
+    """Serve an immutable structure depiction, precompressed when the client allows it"""
+    from depictions import DEFAULT_HEIGHT, DEFAULT_WIDTH, get_depiction, supported_encodings
+    if fmt not in DEPICTION_MIMETYPES:
+        return jsonify({'success': False, 'error': 'Unsupported format'}), 404
+    
+    # PNG is already compressed
+    encoding = None
+    if fmt == 'svg':
+        encoding = next((e for e in supported_encodings() if request.accept_encodings[e]), None)
+    
+    try:
+        # The URL's own SMILES lets any instance render ids it never issued
+        data = get_depiction(depiction_id, fmt, encoding, runner=render_runner,
+                             smiles=request.args.get('smiles'),
+                             width=request.args.get('width', DEFAULT_WIDTH, type=int),
+                             height=request.args.get('height', DEFAULT_HEIGHT, type=int))
+    except (Overloaded, WorkTimeout) as e:
+        return offload_error_response(e)
+    if data is None:
+        return jsonify({'success': False, 'error': 'Unknown depiction'}), 404
+    
+    response = app.response_class(data, mimetype=DEPICTION_MIMETYPES[fmt])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{depiction_id}-{fmt}-{encoding or 'identity'}")
+    response.cache_control.public = True
+    response.cache_control.max_age = DEPICTION_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 5000))
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    from chemistry_utils import predict_reactions_batch
+    try:
+        payload = request.get_json(silent=True) or {}
+        items = payload.get('items')
+        render_svg = payload.get('render_svg', True) is not False
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'Please provide a non-empty list of items'
+            }), 400
         
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Batches are limited to {MAX_BATCH_SIZE} items'
+            }), 400
+        
+        # Items may be {"compound", "catalyst", "reaction_type"} objects or 3-element lists
+        triples = []
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                item = (item.get('compound'), item.get('catalyst'), item.get('reaction_type'))
+            if not isinstance(item, (list, tuple)) or len(item) != 3 or not all(isinstance(v, str) for v in item):
+                return jsonify({
+                    'success': False,
+                    'error': f'Item {index} must provide compound, catalyst and reaction_type strings'
+                }), 400
+            triples.append(tuple(item))
+        
+        results = predict_reactions_batch(triples, render_svg=render_svg)
+        for (_, catalyst, reaction_type), result in zip(triples, results):
+            count_prediction(catalyst, reaction_type, 'success' if result['success'] else 'failure')
         return jsonify({
             'success': True,
-            'reactant': compound,
-            'reactant_svg': reactant_svg,
-            'catalyst': catalyst,
-            'reaction_type': reaction_type,
-            'product': result['product'],
-            'product_svg': product_svg,
-            'reaction_details': result['details']
+            'count': len(results),
+            'results': results
         })
         
     except Exception as e:
-        logging.error(f"Error in prediction: {str(e)}")
+        logging.error(f"Error in batch prediction: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+@app.route('/descriptors', methods=['POST'])
+def batch_descriptors():
+    """Descriptor columns for a list of compounds, plus ΔMW when matching products are given"""
+    from descriptors import columns_to_json, delta_mw, descriptor_table
+    try:
+        payload = request.get_json(silent=True) or {}
+        compounds = payload.get('compounds')
+        products = payload.get('products')
+        
+        if not isinstance(compounds, list) or not compounds or not all(isinstance(c, str) for c in compounds):
+            return jsonify({
+                'success': False,
+                'error': 'Please provide a non-empty list of compound strings'
+            }), 400
+        if products is not None and (not isinstance(products, list) or len(products) != len(compounds)
+                                     or not all(isinstance(p, str) for p in products)):
+            return jsonify({
+                'success': False,
+                'error': 'products must be a list of strings as long as compounds'
+            }), 400
+        if len(compounds) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Batches are limited to {MAX_BATCH_SIZE} items'
+            }), 400
+        
+        columns = descriptor_table(compounds)
+        response = {
+            'success': True,
+            'count': len(compounds),
+            'columns': columns_to_json(columns)
+        }
+        if products is not None:
+            product_columns = descriptor_table(products)
+            response['product_columns'] = columns_to_json(product_columns)
+            response['delta_mw'] = columns_to_json({'mw': delta_mw(columns, product_columns)})['mw']
+        return jsonify(response)
+        
+    except Exception as e:
+        logging.error(f"Error computing descriptors: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+@app.route('/pathways', methods=['GET'])
+def pathways():
+    """Reaction graph reachable from a compound in up to `depth` steps"""
+    from chemistry_utils import normalize_compound
+    from pathways import DEFAULT_DEPTH, DEFAULT_MAX_NODES, explore
+    compound = normalize_compound(request.args.get('compound', ''))
+    if not compound:
+        return jsonify({
+            'success': False,
+            'error': 'Please enter a compound'
+        }), 400
+    try:
+        depth = int(request.args.get('depth', DEFAULT_DEPTH))
+        max_nodes = int(request.args.get('max_nodes', DEFAULT_MAX_NODES))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'depth and max_nodes must be integers'
+        }), 400
+
+    key = f"{PREDICTION_CACHE_VERSION}|pathways|{compound}|{depth}|{max_nodes}"
+    body = response_cache.get(key)
+    if body is None:
+        try:
+            if offload_pool is not None:
+                result = offload_pool.run(explore, compound, depth, max_nodes)
+            else:
+                result = explore(compound, depth, max_nodes)
+        except (Overloaded, WorkTimeout) as e:
+            return offload_error_response(e)
+        except Exception as e:
+            logging.error(f"Error exploring pathways: {str(e)}")
+            ERRORS.inc(endpoint=request.endpoint, kind='exception')
+            return jsonify({
+                'success': False,
+                'error': f'An error occurred: {str(e)}'
+            })
+        body = json.dumps(result, ensure_ascii=False, sort_keys=True)
+        if result.get('success'):
+            response_cache.set(key, body)
+
+    response = app.response_class(body, mimetype='application/json')
+    response.cache_control.public = True
+    response.cache_control.max_age = PREDICTION_CACHE_MAX_AGE
+    return response
+
+@app.route('/similar', methods=['GET'])
+def similar():
+    """Known alcohols and saved products most similar to a compound"""
+    from similarity import DEFAULT_K, find_similar
+    compound = request.args.get('compound', '').strip()
+    source = request.args.get('source') or None
+    if not compound:
+        return jsonify({
+            'success': False,
+            'error': 'Please enter a compound'
+        }), 400
+    if source not in (None, 'alcohol', 'reaction'):
+        return jsonify({
+            'success': False,
+            'error': "source must be 'alcohol' or 'reaction'"
+        }), 400
+    try:
+        return jsonify(find_similar(compound, request.args.get('k', DEFAULT_K, type=int), source))
+    except Exception as e:
+        logging.error(f"Error in similarity search: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+HISTORY_FIELDS = ('id', 'reactant', 'reactant_smiles', 'catalyst', 'reaction_type',
+                  'product', 'product_smiles', 'details', 'created_at', 'hit_count', 'last_seen_at')
+HISTORY_FILTERS = ('reactant', 'catalyst', 'reaction_type')
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+def encode_history_cursor(created_at, reaction_id):
+    """Pack the position of the last returned row into an opaque token"""
+    raw = f"{created_at.isoformat()}|{reaction_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_history_cursor(cursor):
+    """Unpack a cursor token into (created_at, id); raises ValueError if malformed"""
+    created_at, reaction_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return datetime.fromisoformat(created_at), int(reaction_id)
+
+def after_history_cursor(query, cursor):
+    """Restrict a newest-first Reaction query to rows after the cursor position"""
+    from models import Reaction
+    if not cursor:
+        return query
+    cursor_created_at, cursor_id = decode_history_cursor(cursor)
+    return query.filter(db.or_(
+        Reaction.created_at < cursor_created_at,
+        db.and_(Reaction.created_at == cursor_created_at, Reaction.id < cursor_id)
+    ))
+
+def history_fields():
+    """Fields requested with ?fields=, and any that aren't history fields"""
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else list(HISTORY_FIELDS)
+    return fields, [f for f in fields if f not in HISTORY_FIELDS]
+
+def history_item(row, fields):
+    """JSON-ready dict of the requested fields of a history row"""
+    mapping = row._mapping
+    item = {f: mapping[f] for f in fields}
+    for key in ('created_at', 'last_seen_at'):
+        if key in item:
+            item[key] = item[key].isoformat() if item[key] else None
+    if 'hit_count' in item:
+        item['hit_count'] = item['hit_count'] or 1
+    return item
+
+def recompute_values(payload):
+    """Rebuild the Reaction row for a save whose token couldn't be redeemed"""
+    from chemistry_utils import normalize_compound
+    compound = normalize_compound(payload.get('compound', ''))
+    catalyst = payload.get('catalyst', '')
+    reaction_type = payload.get('reaction_type', '')
+    result = run_prediction(compound, catalyst, reaction_type)
+    if not result['success']:
+        return None
+    return reaction_values(compound, catalyst, reaction_type, result)
+
+@app.route('/history/save', methods=['POST'])
+def save_result():
+    try:
+        payload = request.get_json(silent=True) or request.form
+        values = result_tokens.resolve(payload.get('result_token'))
+        if values is None and payload.get('compound'):
+            # The token expired or was issued by an instance that doesn't share our store
+            values = recompute_values(payload)
+        if values is None:
+            return jsonify({
+                'success': False,
+                'error': 'This result has expired. Please run the prediction again.'
+            })
+        
+        error = save_reaction_values(values)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            })
+        return jsonify({'success': True})
+        
+    except (Overloaded, WorkTimeout) as e:
+        return offload_error_response(e)
+    except Exception as e:
+        logging.error(f"Error saving reaction: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
         return jsonify({
             'success': False,
             'error': f'An error occurred: {str(e)}'
@@ -129,21 +734,198 @@ def predict():
 def get_history():
     try:
         from models import Reaction
-        reactions = Reaction.query.order_by(Reaction.created_at.desc()).limit(50).all()
+        
+        limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+        
+        fields, unknown = history_fields()
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown fields: {', '.join(unknown)}"
+            }), 400
+        
+        # The cursor columns are always needed, even if the client didn't ask for them
+        selected = list(dict.fromkeys(fields + ['created_at', 'id']))
+        query = db.session.query(*[getattr(Reaction, f) for f in selected])
+        
+        for name in HISTORY_FILTERS:
+            value = request.args.get(name)
+            if value:
+                query = query.filter(getattr(Reaction, name) == value)
+        
+        try:
+            query = after_history_cursor(query, request.args.get('cursor'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor'
+            }), 400
+        
+        rows = query.order_by(Reaction.created_at.desc(), Reaction.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id)
+        
         return jsonify({
             'success': True,
-            'reactions': [reaction.to_dict() for reaction in reactions]
+            'reactions': [history_item(row, fields) for row in rows],
+            'next_cursor': next_cursor
         })
     except Exception as e:
         logging.error(f"Error retrieving history: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
         return jsonify({
             'success': False,
             'error': 'Database temporarily unavailable. History feature will be restored shortly.'
         })
 
+# Substructure candidates are verified in chunks until a page is filled or this many were checked
+SEARCH_CHUNK_SIZE = 200
+SEARCH_MAX_CANDIDATES = int(os.environ.get("SEARCH_MAX_CANDIDATES", 5000))
+
+@app.route('/history/search', methods=['GET'])
+def search_history():
+    """Saved reactions matching a text query and/or a substructure, newest first"""
+    try:
+        from models import Reaction
+        from search import SUBSTRUCTURE_SIDES, matches, parse_query, substructure_filter, text_filter
+        
+        text = request.args.get('q', '').strip()
+        substructure = request.args.get('substructure', '').strip()
+        side = request.args.get('side', 'product')
+        limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+        if not text and not substructure:
+            return jsonify({
+                'success': False,
+                'error': 'Please provide a search text (q) or a substructure'
+            }), 400
+        if side not in SUBSTRUCTURE_SIDES and side != 'any':
+            return jsonify({
+                'success': False,
+                'error': "side must be 'reactant', 'product' or 'any'"
+            }), 400
+        sides = list(SUBSTRUCTURE_SIDES) if side == 'any' else [side]
+        
+        fields, unknown = history_fields()
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown fields: {', '.join(unknown)}"
+            }), 400
+        selected = list(dict.fromkeys(fields + ['created_at', 'id']))
+        
+        query_mol = None
+        if substructure:
+            query_mol, error = parse_query(substructure)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': error
+                }), 400
+            # Verification needs the SMILES even when the client didn't ask for them
+            selected = list(dict.fromkeys(selected + [SUBSTRUCTURE_SIDES[s][0] for s in sides]))
+        
+        query = db.session.query(*[getattr(Reaction, f) for f in selected])
+        if text:
+            query = query.filter(text_filter(Reaction, db.engine, text))
+        if query_mol is not None:
+            query = query.filter(substructure_filter(Reaction, query_mol, sides))
+        query = query.order_by(Reaction.created_at.desc(), Reaction.id.desc())
+        
+        try:
+            cursor = request.args.get('cursor')
+            chunk = after_history_cursor(query, cursor).limit(limit + 1 if query_mol is None else SEARCH_CHUNK_SIZE).all()
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor'
+            }), 400
+        
+        if query_mol is None:
+            rows = chunk[:limit]
+            has_more = len(chunk) > limit
+        else:
+            # Screened rows are verified with RDKit; the cursor tracks the last row examined
+            rows = []
+            examined = 0
+            last = None
+            has_more = False
+            while chunk:
+                for row in chunk:
+                    if len(rows) == limit:
+                        has_more = True
+                        break
+                    examined += 1
+                    last = row
+                    if matches(query_mol, row, sides):
+                        rows.append(row)
+                if has_more or len(chunk) < SEARCH_CHUNK_SIZE:
+                    break
+                if examined >= SEARCH_MAX_CANDIDATES:
+                    has_more = True
+                    break
+                chunk = after_history_cursor(query, encode_history_cursor(last.created_at, last.id)).limit(
+                    SEARCH_CHUNK_SIZE).all()
+        
+        next_cursor = None
+        if has_more:
+            position = rows[-1] if query_mol is None else last
+            next_cursor = encode_history_cursor(position.created_at, position.id)
+        
+        return jsonify({
+            'success': True,
+            'reactions': [history_item(row, fields) for row in rows],
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        logging.error(f"Error searching history: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': 'Database temporarily unavailable. History feature will be restored shortly.'
+        })
+
+@app.route('/history/export', methods=['GET'])
+def export_history():
+    """Stream every saved reaction as gzipped CSV, Parquet or Arrow"""
+    from history_export import FORMATS, available_formats, export_chunks
+    fmt = request.args.get('format', 'csv.gz')
+    if fmt not in available_formats():
+        return jsonify({
+            'success': False,
+            'error': f"format must be one of: {', '.join(available_formats())}"
+        }), 400
+    filters = {name: request.args[name] for name in HISTORY_FILTERS if request.args.get(name)}
+    try:
+        chunks = export_chunks(db.session, filters, fmt)
+    except Exception as e:
+        logging.error(f"Error exporting history: {str(e)}")
+        ERRORS.inc(endpoint=request.endpoint, kind='exception')
+        return jsonify({
+            'success': False,
+            'error': 'Database temporarily unavailable. History feature will be restored shortly.'
+        })
+    response = app.response_class(stream_with_context(chunks), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="reactions.{fmt}"'
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint for this worker"""
+    return app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/history/view', methods=['GET'])
 def view_history():
     return render_template('history.html')
 
+# Warm up before the server hands this worker any requests
+startup.record_phase('setup', time.perf_counter() - _startup_began - sum(startup.PHASES.values()))
+startup.warm_up()
+startup.report()
+
 if __name__ == '__main__':
+    create_tables()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,218 @@
+"""ASGI entry point: serve the app from an event loop instead of sync workers.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:5000 asgi:app
+
+Connections are accepted and read on the event loop. Each request is then
+run on a bounded thread pool, and live RDKit work inside it goes to the
+offload process pool (enabled by default in this mode). Requests beyond
+ASGI_MAX_PENDING get an immediate 503, and a request that hasn't produced
+a response within ASGI_REQUEST_TIMEOUT seconds gets a 504, so slow
+molecules can't starve the server.
+"""
+import asyncio
+import concurrent.futures
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# The event loop only helps if RDKit work leaves the request threads
+os.environ.setdefault("PREDICT_OFFLOAD", "true")
+
+from app import app as flask_app, offload_pool, history_writer
+
+
+class WSGIBridge:
+    """Run a WSGI app from ASGI with a bounded thread pool, queue-depth limit and timeout"""
+
+    # Response chunks buffered between the app thread and the event loop
+    STREAM_BUFFER = 8
+
+    def __init__(self, wsgi_app, max_threads=32, max_pending=128, timeout=30.0):
+        self.wsgi_app = wsgi_app
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='asgi')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if history_writer is not None:
+                    history_writer.stop()
+                if offload_pool is not None:
+                    offload_pool.shutdown()
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        with self._lock:
+            accepted = self._pending < self.max_pending
+            if accepted:
+                self._pending += 1
+        if not accepted:
+            await self._send_error(send, 503, 'The server is busy. Please try again shortly.')
+            return
+
+        body = io.BytesIO()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                self._release()
+                return
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+
+        # One thread runs the app and drains its body, so context-bound streams
+        # (stream_with_context) start and end on the thread that created them
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.STREAM_BUFFER)
+        abandoned = threading.Event()
+        future = self._executor.submit(self._run, self._environ(scope, body), loop, queue, abandoned)
+        # The slot stays taken until the handler really finishes, even after a timeout
+        future.add_done_callback(lambda f: self._release())
+        try:
+            message = await asyncio.wait_for(queue.get(), self.timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"{scope['method']} {scope['path']} exceeded the {self.timeout}s request timeout")
+            abandoned.set()
+            await self._send_error(send, 504, 'The request took too long to process.')
+            return
+        if message[0] == 'error':
+            abandoned.set()
+            logging.error(f"Error handling {scope['method']} {scope['path']}: {str(message[1])}")
+            await self._send_error(send, 500, f'An error occurred: {str(message[1])}')
+            return
+
+        try:
+            await send({'type': 'http.response.start', 'status': message[1], 'headers': message[2]})
+            while True:
+                message = await queue.get()
+                if message[0] == 'end':
+                    break
+                if message[1]:
+                    await send({'type': 'http.response.body', 'body': message[1], 'more_body': True})
+        finally:
+            # Stops the producer if the client went away mid-stream
+            abandoned.set()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, environ, loop, queue, abandoned):
+        """Call the WSGI app and feed ('start', status, headers), ('body', chunk)... ('end',) to queue"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        def emit(message):
+            # Blocks while the client is slower than the app; gives up once the request is abandoned
+            if abandoned.is_set() or loop.is_closed():
+                return False
+            future = asyncio.run_coroutine_threadsafe(queue.put(message), loop)
+            while not abandoned.is_set():
+                try:
+                    future.result(timeout=0.5)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    continue
+            future.cancel()
+            return False
+
+        result = None
+        started = False
+        try:
+            result = self.wsgi_app(environ, start_response)
+            chunks = iter(result)
+            # Flask calls start_response before yielding the first chunk
+            first = next(chunks, b'')
+            started = emit(('start', response['status'], response['headers']))
+            if not started:
+                return
+            for chunk in itertools.chain((first,), chunks):
+                if not emit(('body', chunk)):
+                    return
+            emit(('end',))
+        except Exception as e:
+            if started:
+                # Too late for an error status; end the response where it stopped
+                logging.error(f"Error streaming {environ['REQUEST_METHOD']} {environ['PATH_INFO']}: {str(e)}")
+                emit(('end',))
+            else:
+                emit(('error', e))
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    @staticmethod
+    def _environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'REMOTE_ADDR': client[0],
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        # The body is fully buffered, so its length is known even for chunked uploads
+        environ['CONTENT_LENGTH'] = str(len(body.getbuffer()))
+        environ['wsgi.input_terminated'] = True
+        return environ
+
+    @staticmethod
+    async def _send_error(send, status, message):
+        body = json.dumps({'success': False, 'error': message}).encode('utf-8')
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode('ascii'))]
+        if status == 503:
+            headers.append((b'retry-after', b'1'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = WSGIBridge(
+    flask_app,
+    max_threads=int(os.environ.get("ASGI_THREADS", 32)),
+    max_pending=int(os.environ.get("ASGI_MAX_PENDING", 128)),
+    timeout=float(os.environ.get("ASGI_REQUEST_TIMEOUT", 30))
+)
@@ -0,0 +1,202 @@
+"""Benchmark the SMARTS template engine against the substring-matching path it replaced.
+
+Run from the repository root:
+    python benchmarks/bench_reaction_templates.py [--repeat N]
+
+The legacy_* functions below are verbatim copies of the pre-template
+implementations, kept only so the comparison stays reproducible.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rdkit import Chem, RDLogger
+
+from chemistry_utils import COMMON_ALCOHOLS, MOLECULE_REGISTRY, apply_rule, substrate_class_of
+
+# Free-form alcohols outside the hardcoded set
+EXTRA_ALCOHOLS = [
+    'CC(O)CC', 'OCC1CCCCC1', 'CC(C)(O)CC', 'OC1CCC(C)CC1', 'Cc1ccc(O)cc1',
+    'OCCCCCCCCO', 'CC(C)CC(C)(C)O', 'OC(c1ccccc1)c1ccccc1', 'OCCOCCO', 'CCCCCCCCCCCCO'
+]
+
+def legacy_oxidize_alcohol(mol):
+    """Oxidation reaction for alcohols"""
+    smiles = Chem.MolToSmiles(mol)
+    # Check for primary alcohol (RCH₂OH)
+    if 'CO' in smiles and not 'C(C)(C)O' in smiles:
+        # Primary alcohols oxidize to aldehydes/carboxylic acids
+        if smiles == 'CO':  # Methanol
+            return 'O=C=O', 'Methanol is fully oxidized to CO₂ and H₂O'
+        else:
+            # Replace terminal CH₂OH with CHO (aldehyde)
+            aldehyde_smiles = smiles.replace('CO', 'C=O')
+            # Further oxidation to carboxylic acid
+            acid_smiles = smiles.replace('CO', 'C(=O)O')
+            return acid_smiles, 'Primary alcohol oxidizes first to aldehyde then to carboxylic acid'
+    
+    # Check for secondary alcohol (R₂CHOH)
+    elif 'C(C)O' in smiles or 'C(CC)O' in smiles:
+        # Secondary alcohols oxidize to ketones
+        ketone_smiles = smiles.replace('C(C)O', 'C(C)=O').replace('C(CC)O', 'C(CC)=O')
+        return ketone_smiles, 'Secondary alcohol oxidizes to ketone'
+    
+    # Tertiary alcohols (R₃COH) don't easily oxidize
+    elif 'C(C)(C)O' in smiles:
+        return '', 'Tertiary alcohols are resistant to oxidation under normal conditions'
+    
+    # Phenol
+    elif 'c1ccccc1O' in smiles:
+        return '', 'Phenols undergo complex oxidation reactions depending on conditions'
+    
+    return '', 'Oxidation pathway not determined'
+
+def legacy_dehydrate_alcohol(mol):
+    """Dehydration reaction for alcohols"""
+    smiles = Chem.MolToSmiles(mol)
+    
+    # Handle specific alcohols
+    if smiles == 'CC(C)(C)O':  # tert-butanol
+        return 'C=C(C)C', 'tert-Butanol undergoes dehydration to form 2-methylpropene (isobutylene)'
+    
+    # Simple primary alcohols (except methanol)
+    elif 'CCO' in smiles and not 'C(C)(C)O' in smiles and smiles != 'CO':
+        alkene_smiles = smiles.replace('CCO', 'C=C')
+        return alkene_smiles, 'Alcohol undergoes dehydration to form an alkene'
+    
+    # Secondary alcohols
+    elif smiles == 'CC(C)O':  # isopropanol
+        return 'C=CC', 'Isopropanol undergoes dehydration to form propene'
+    elif 'C(C)O' in smiles:
+        alkene_smiles = smiles.replace('C(C)O', 'C=C')
+        return alkene_smiles, 'Secondary alcohol dehydrates to form an alkene'
+    
+    # Methanol can't undergo typical dehydration
+    elif smiles == 'CO':
+        return '', 'Methanol cannot undergo typical dehydration as it lacks a β-hydrogen'
+    
+    # Phenol
+    elif 'c1ccccc1O' in smiles:
+        return '', "Phenols generally don't undergo simple dehydration reactions"
+    
+    return '', 'Dehydration pathway not determined'
+
+def legacy_halogenate_alcohol(mol, catalyst):
+    """Halogenation reaction for alcohols"""
+    smiles = Chem.MolToSmiles(mol)
+    
+    halogen = ''
+    if catalyst.lower() in ['hcl', 'socl2', 'pcl5']:
+        halogen = 'Cl'
+        halogen_name = 'chloride'
+    elif catalyst.lower() in ['hbr', 'pbr3']:
+        halogen = 'Br'
+        halogen_name = 'bromide'
+    elif catalyst.lower() in ['hi', 'pi3']:
+        halogen = 'I'
+        halogen_name = 'iodide'
+    else:
+        return '', 'Please specify a halogenating agent (HCl, HBr, HI, SOCl₂, etc.)'
+    
+    # Handle specific alcohols
+    if smiles == 'CC(C)O':  # isopropanol
+        if halogen == 'Cl':
+            return 'CC(C)Cl', f'Isopropanol reacts with {catalyst} to form isopropyl chloride'
+        elif halogen == 'Br':
+            return 'CC(C)Br', f'Isopropanol reacts with {catalyst} to form isopropyl bromide'
+        elif halogen == 'I':
+            return 'CC(C)I', f'Isopropanol reacts with {catalyst} to form isopropyl iodide'
+    
+    elif smiles == 'CC(C)(C)O':  # tert-butanol
+        if halogen == 'Cl':
+            return 'CC(C)(C)Cl', f'tert-Butanol reacts with {catalyst} to form tert-butyl chloride'
+        elif halogen == 'Br':
+            return 'CC(C)(C)Br', f'tert-Butanol reacts with {catalyst} to form tert-butyl bromide'
+        elif halogen == 'I':
+            return 'CC(C)(C)I', f'tert-Butanol reacts with {catalyst} to form tert-butyl iodide'
+    
+    # Generic alcohol halogenation
+    elif 'CO' in smiles:
+        halogenated_smiles = smiles.replace('O', halogen)
+        return halogenated_smiles, f'Alcohol is converted to alkyl {halogen_name}'
+    
+    # Phenol
+    elif 'c1ccccc1O' in smiles:
+        return '', 'Phenols undergo different halogenation pathways, typically at the ring positions'
+    
+    return '', 'Halogenation pathway not determined'
+
+def legacy_esterify_alcohol(mol):
+    """Esterification reaction for alcohols with acetic acid"""
+    smiles = Chem.MolToSmiles(mol)
+    
+    # Handle specific alcohols
+    if smiles == 'CC(C)O':  # isopropanol
+        return 'CC(C)OC(=O)C', 'Isopropanol reacts with acetic acid to form isopropyl acetate'
+        
+    elif smiles == 'CC(C)(C)O':  # tert-butanol
+        return 'CC(C)(C)OC(=O)C', 'tert-Butanol reacts with acetic acid to form tert-butyl acetate'
+    
+    # Replace OH with OC(=O)C for acetate ester for other alcohols
+    elif 'CO' in smiles:
+        ester_smiles = smiles.replace('O', 'OC(=O)C')
+        return ester_smiles, 'Alcohol reacts with acetic acid to form an acetate ester'
+    
+    # Phenol
+    elif 'c1ccccc1O' in smiles:
+        ester_smiles = 'CC(=O)Oc1ccccc1'
+        return ester_smiles, 'Phenol reacts with acetic acid to form phenyl acetate'
+    
+    return '', 'Esterification pathway not determined'
+
+
+def _rule_dispatch(reaction_type, catalyst):
+    """The production path for one reaction: cached substrate class, then the rule table"""
+    def run(mol, canonical_smiles):
+        product_smiles, details, error = apply_rule(
+            substrate_class_of(mol, canonical_smiles), reaction_type, catalyst, mol)
+        return product_smiles, error or details
+    return run
+
+def _legacy(func, *extra):
+    return lambda mol, canonical_smiles: func(mol, *extra)
+
+def _cases():
+    return [
+        ('oxidation', _rule_dispatch('oxidation', 'kmno4'), _legacy(legacy_oxidize_alcohol)),
+        ('dehydration', _rule_dispatch('dehydration', 'h2so4'), _legacy(legacy_dehydrate_alcohol)),
+        ('halogenation', _rule_dispatch('halogenation', 'hbr'), _legacy(legacy_halogenate_alcohol, 'hbr')),
+        ('esterification', _rule_dispatch('esterification', 'h2so4'), _legacy(legacy_esterify_alcohol)),
+    ]
+
+def _time(func, parsed, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for mol, canonical_smiles in parsed:
+            func(mol, canonical_smiles)
+    return (time.perf_counter() - started) / (repeat * len(parsed)) * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the molecule set (default: %(default)s)')
+    args = parser.parse_args(argv)
+    RDLogger.DisableLog('rdApp.*')
+
+    smiles = list(COMMON_ALCOHOLS.values()) + EXTRA_ALCOHOLS
+    parsed = [MOLECULE_REGISTRY.get(s) for s in smiles]
+
+    print(f"{len(parsed)} molecules, {args.repeat} passes")
+    print(f"{'reaction':<16}{'legacy us/mol':>15}{'template us/mol':>17}{'legacy hits':>13}{'template hits':>15}")
+    for name, current, legacy in _cases():
+        legacy_us = _time(legacy, parsed, args.repeat)
+        current_us = _time(current, parsed, args.repeat)
+        legacy_hits = sum(1 for mol, canonical in parsed if legacy(mol, canonical)[0])
+        current_hits = sum(1 for mol, canonical in parsed if current(mol, canonical)[0])
+        print(f"{name:<16}{legacy_us:>15.1f}{current_us:>17.1f}{legacy_hits:>13}{current_hits:>15}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Latency and throughput benchmarks for chemistry_utils and the Flask endpoints.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py [--only micro,sweep,freeform,load] [--quick]
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--tolerance 0.3]
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+
+Sections:
+    micro     rule dispatch per reaction type, classification, predict_reaction and a cold get_mol_svg
+    sweep     predict_reaction over every COMMON_ALCOHOLS x CATALYSTS x REACTION_TYPES triple
+    freeform  build_prediction over benchmarks/freeform_corpus.smi with cold caches
+    load      concurrent in-process POST /predict and GET /history against a throwaway SQLite DB
+
+Every benchmark reports p50/p95/p99 latency in microseconds and throughput.
+With --baseline, results are compared against the stored run and the exit
+status is 1 if a p50 latency (or load throughput) regressed by more than
+the tolerance; p95 changes are shown but not enforced. Baselines are
+machine-specific: regenerate one on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep every cache and the database away from a real deployment's files
+_workdir = tempfile.mkdtemp(prefix='chemreact_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'bench.db')}"
+os.environ['RESPONSE_CACHE_PATH'] = os.path.join(_workdir, 'responses.sqlite3')
+os.environ['DEPICTION_INDEX_PATH'] = os.path.join(_workdir, 'depictions.sqlite3')
+os.environ['RESULT_TOKEN_PATH'] = os.path.join(_workdir, 'result_tokens.sqlite3')
+os.environ['SIMILARITY_INDEX_DIR'] = os.path.join(_workdir, 'similarity')
+os.environ.pop('SVG_CACHE_DIR', None)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from rdkit import RDLogger, rdBase
+
+import chemistry_utils
+from chemistry_utils import (COMMON_ALCOHOLS, CATALYSTS, REACTION_TYPES, MOLECULE_REGISTRY, SVG_CACHE,
+                             apply_rule, build_prediction, get_mol_svg, predict_reaction, substrate_class_of)
+from reaction_templates import classify_alcohol
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'freeform_corpus.smi')
+SECTIONS = ('micro', 'sweep', 'freeform', 'load')
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+def summarize(samples, elapsed=None):
+    """Reduce per-call durations (seconds) to latency percentiles and throughput"""
+    ordered = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(samples)
+    return {
+        'n': len(samples),
+        'mean_us': sum(samples) / len(samples) * 1e6 if samples else 0.0,
+        'p50_us': percentile(ordered, 0.50) * 1e6,
+        'p95_us': percentile(ordered, 0.95) * 1e6,
+        'p99_us': percentile(ordered, 0.99) * 1e6,
+        'throughput_per_s': len(samples) / elapsed if elapsed else 0.0
+    }
+
+def _measure(func, args_list, repeat, before_each=None, warmup=True):
+    if warmup:
+        for args in args_list:
+            func(*args)
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            if before_each is not None:
+                before_each()
+            started = time.perf_counter()
+            func(*args)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+def load_corpus(path=CORPUS_PATH):
+    """Read the free-form SMILES corpus, skipping blank lines and comments"""
+    with open(path, encoding='utf-8') as handle:
+        return [line.strip() for line in handle if line.strip() and not line.startswith('#')]
+
+def _clear_chemistry_caches():
+    MOLECULE_REGISTRY.clear()
+    SVG_CACHE.clear()
+
+def _rule_dispatch(mol, canonical_smiles, reaction_type, catalyst):
+    # The dispatch predict_reaction runs once the compound is parsed
+    return apply_rule(substrate_class_of(mol, canonical_smiles), reaction_type, catalyst, mol)
+
+def bench_micro(repeat):
+    """Per-function timings on pre-parsed molecules"""
+    parsed = [MOLECULE_REGISTRY.get(s) for s in COMMON_ALCOHOLS.values()]
+    mol_args = [(mol,) for mol, _ in parsed]
+
+    def rule_args(reaction_type, catalyst):
+        return [(mol, canonical, reaction_type, catalyst) for mol, canonical in parsed]
+
+    results = {
+        'micro.classify_alcohol': summarize(_measure(classify_alcohol, mol_args, repeat)),
+        'micro.oxidize_alcohol': summarize(_measure(_rule_dispatch, rule_args('oxidation', 'kmno4'), repeat)),
+        'micro.dehydrate_alcohol': summarize(_measure(_rule_dispatch, rule_args('dehydration', 'h2so4'), repeat)),
+        'micro.halogenate_alcohol': summarize(_measure(_rule_dispatch, rule_args('halogenation', 'hbr'), repeat)),
+        'micro.esterify_alcohol': summarize(_measure(_rule_dispatch, rule_args('esterification', 'h2so4'), repeat)),
+        'micro.predict_reaction': summarize(_measure(
+            predict_reaction, [(name, 'h2so4', 'dehydration') for name in COMMON_ALCOHOLS], repeat)),
+        # Cold render: layout and drawing, not the LRU lookup
+        'micro.get_mol_svg_cold': summarize(_measure(
+            get_mol_svg, [(smiles,) for smiles in COMMON_ALCOHOLS.values()], repeat,
+            before_each=SVG_CACHE.clear)),
+    }
+    return results
+
+def bench_sweep(repeat):
+    """predict_reaction over the full dropdown grid"""
+    triples = [(alcohol, catalyst, reaction_type)
+               for alcohol in COMMON_ALCOHOLS for catalyst in CATALYSTS for reaction_type in REACTION_TYPES]
+    started = time.perf_counter()
+    samples = _measure(predict_reaction, triples, repeat)
+    return {'sweep.predict_reaction': summarize(samples, time.perf_counter() - started)}
+
+def bench_freeform(repeat):
+    """build_prediction with depictions over the free-form corpus, starting from cold caches each pass"""
+    corpus = load_corpus()
+    triples = [(smiles, catalyst, reaction_type)
+               for smiles in corpus for catalyst, reaction_type in (('kmno4', 'oxidation'), ('h2so4', 'dehydration'))]
+    samples = []
+    elapsed = 0.0
+    for _ in range(repeat):
+        _clear_chemistry_caches()
+        started = time.perf_counter()
+        samples.extend(_measure(build_prediction, triples, 1, warmup=False))
+        elapsed += time.perf_counter() - started
+    return {'freeform.build_prediction': summarize(samples, elapsed)}
+
+def bench_load(requests_per_thread, threads):
+    """Concurrent requests through the Flask test client against a throwaway SQLite database"""
+    from app import app, create_tables, history_writer
+    create_tables()
+
+    corpus = [s for s in load_corpus() if chemistry_utils.check_compound(s) is None]
+    alcohols = list(COMMON_ALCOHOLS)
+    catalysts = list(CATALYSTS)
+    reaction_types = list(REACTION_TYPES)
+
+    def predict_form(rng):
+        # Two thirds dropdown combinations, one third free-form SMILES
+        compound = rng.choice(alcohols) if rng.random() < 2 / 3 else rng.choice(corpus)
+        return {
+            'compound': compound,
+            'catalyst': rng.choice(catalysts),
+            'reaction_type': rng.choice(reaction_types),
+            'save_to_db': 'true' if rng.random() < 0.2 else 'false'
+        }
+
+    # Warm-up: precomputed table, template compilation and a populated history
+    client = app.test_client()
+    rng = random.Random(0)
+    for _ in range(50):
+        client.post('/predict', data=dict(predict_form(rng), save_to_db='true'))
+    if history_writer is not None:
+        history_writer.flush()
+
+    samples = {'load.post_predict': [], 'load.get_history': []}
+    lock = threading.Lock()
+
+    def worker(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        local = {key: [] for key in samples}
+        for _ in range(requests_per_thread):
+            if rng.random() < 0.8:
+                key, call = 'load.post_predict', lambda: client.post('/predict', data=predict_form(rng))
+            else:
+                key, call = 'load.get_history', lambda: client.get('/history', query_string={'limit': 50})
+            started = time.perf_counter()
+            response = call()
+            local[key].append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{key} returned {response.status_code}")
+        with lock:
+            for key, values in local.items():
+                samples[key].extend(values)
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(1, threads + 1)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if history_writer is not None:
+        history_writer.flush()
+
+    results = {key: summarize(values, elapsed) for key, values in samples.items()}
+    results['load.all'] = summarize(samples['load.post_predict'] + samples['load.get_history'], elapsed)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return (rows, regressions) comparing latency percentiles and load throughput"""
+    rows = []
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        # Tail latencies are shown but too noisy on shared machines to fail a run
+        checks = [('p50_us', False, True), ('p95_us', False, False)]
+        if name.startswith('load.'):
+            checks.append(('throughput_per_s', True, True))
+        for metric, higher_is_better, gated in checks:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = gated and (-change > tolerance if higher_is_better else change > tolerance)
+            rows.append((name, metric, old, new, change, regressed))
+            if regressed:
+                regressions.append(f"{name} {metric}")
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', help=f"Comma-separated sections to run (default: {','.join(SECTIONS)})")
+    parser.add_argument('--quick', action='store_true', help='Fewer iterations, for a smoke run')
+    parser.add_argument('--threads', type=int, default=4, help='Concurrent clients in the load test (default: %(default)s)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Relative slowdown tolerated before a comparison fails (default: %(default)s)')
+    args = parser.parse_args(argv)
+    RDLogger.DisableLog('rdApp.*')
+
+    sections = args.only.split(',') if args.only else list(SECTIONS)
+    unknown = [s for s in sections if s not in SECTIONS]
+    if unknown:
+        parser.error(f"Unknown sections: {', '.join(unknown)}")
+
+    repeat = 5 if args.quick else 50
+    results = {}
+    if 'micro' in sections:
+        results.update(bench_micro(repeat))
+    if 'sweep' in sections:
+        results.update(bench_sweep(1 if args.quick else 3))
+    if 'freeform' in sections:
+        results.update(bench_freeform(2 if args.quick else 10))
+    if 'load' in sections:
+        results.update(bench_load(50 if args.quick else 500, args.threads))
+
+    print(f"{'benchmark':<30}{'n':>8}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'per s':>11}")
+    for name, stats in sorted(results.items()):
+        print(f"{name:<30}{stats['n']:>8}{stats['p50_us']:>11.1f}{stats['p95_us']:>11.1f}"
+              f"{stats['p99_us']:>11.1f}{stats['throughput_per_s']:>11.1f}")
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'rdkit': rdBase.rdkitVersion,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick,
+            'threads': args.threads
+        },
+        'results': results
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        rows, regressions = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.baseline} ({baseline.get('meta', {}).get('created_at', 'unknown date')}), "
+              f"tolerance {args.tolerance:.0%}")
+        for name, metric, old, new, change, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:<30}{metric:<18}{old:>11.1f}{new:>11.1f}{change:>+9.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class FileStore:
+    """Directory-backed string store shared by every worker on a host.
+
+    With max_entries or max_bytes set, the least recently written files
+    beyond either bound are deleted at start-up and every TRIM_EVERY writes.
+    """
+
+    TRIM_EVERY = 100
+
+    def __init__(self, directory, suffix='.txt', max_entries=None, max_bytes=None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.trim()
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + self.suffix)
+
+    def get(self, key):
+        """Return the stored value for key, or None if it isn't on disk"""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Error reading cache file for {key}: {e}")
+            return None
+
+    def set(self, key, value):
+        """Write value atomically so concurrent readers never see partial files"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                handle.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logging.warning(f"Error writing cache file for {key}: {e}")
+            return
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self.trim()
+
+    def _entries(self):
+        """(path, mtime, size) of every stored file, newest first"""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, stat.st_mtime, stat.st_size))
+        files.sort(key=lambda item: item[1], reverse=True)
+        return files
+
+    def _remove(self, paths):
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def prune(self, max_age):
+        """Delete entries last written more than max_age seconds ago"""
+        cutoff = time.time() - max_age
+        return self._remove(path for path, mtime, _ in self._entries() if mtime < cutoff)
+
+    def trim(self):
+        """Delete the oldest files beyond max_entries or max_bytes; returns how many were removed"""
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+        stale = []
+        total = 0
+        for position, (path, _, size) in enumerate(self._entries()):
+            total += size
+            if ((self.max_entries is not None and position >= self.max_entries) or
+                    (self.max_bytes is not None and total > self.max_bytes)):
+                stale.append(path)
+        return self._remove(stale)
+
+
+class SQLiteStore:
+    """SQLite-backed string store; WAL mode lets every worker read and write concurrently.
+
+    With max_entries or max_bytes set, the oldest writes beyond either bound
+    are deleted at start-up and every TRIM_EVERY writes after that.
+    """
+
+    TRIM_EVERY = 100
+
+    def __init__(self, path, table='cache', max_entries=None, max_bytes=None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.trim()
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        """Return the stored value for key, or None"""
+        try:
+            row = self._connect().execute(f'SELECT value FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Error reading cache entry for {key}: {e}")
+            return None
+        return row[0] if row else None
+
+    def set(self, key, value):
+        """Insert or replace the value stored under key"""
+        try:
+            self._connect().execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?)',
+                (key, value, time.time())
+            )
+        except sqlite3.Error as e:
+            logging.warning(f"Error writing cache entry for {key}: {e}")
+            return
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self.trim()
+
+    def trim(self):
+        """Delete the oldest entries beyond max_entries or max_bytes; returns how many were removed"""
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+        bounds = []
+        if self.max_entries is not None:
+            bounds.append(f'position > {int(self.max_entries)}')
+        if self.max_bytes is not None:
+            bounds.append(f'total > {int(self.max_bytes)}')
+        try:
+            cursor = self._connect().execute(
+                f'DELETE FROM {self.table} WHERE key IN ('
+                f'SELECT key FROM (SELECT key, '
+                f'ROW_NUMBER() OVER (ORDER BY updated_at DESC) AS position, '
+                f'SUM(length(value)) OVER (ORDER BY updated_at DESC ROWS UNBOUNDED PRECEDING) AS total '
+                f'FROM {self.table}) WHERE {" OR ".join(bounds)})'
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logging.warning(f"Error trimming cache: {e}")
+            return 0
+
+    def prune(self, max_age):
+        """Delete entries last written more than max_age seconds ago"""
+        try:
+            cursor = self._connect().execute(
+                f'DELETE FROM {self.table} WHERE updated_at < ?', (time.time() - max_age,))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logging.warning(f"Error pruning cache: {e}")
+            return 0
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and, optionally, total size"""
+
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=len, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.store = store
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the cached value for key, consulting the backing store on a miss"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                self._insert(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """Store value under key and write it through to the backing store"""
+        self._insert(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def _insert(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never let a single oversized entry flush the whole cache
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key, 0)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key, 0)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every in-memory entry and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
@@ -1,7 +1,15 @@
 from rdkit import Chem
-from rdkit.Chem import AllChem
-from rdkit.Chem.Draw import rdMolDraw2D
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import threading
+from caching import LRUCache, FileStore
+from guardrails import admission_error, can_depict, check_smiles, timed_depiction
+from metrics import STAGE_SECONDS, replay, run_captured
+from molecule_registry import MoleculeRegistry
+from reaction_rules import load_rules
+from reaction_templates import TEMPLATE_SMARTS, apply_template, classify_alcohol, is_alcohol, is_phenol
 
 # Dictionary of common alcohols and their SMILES notation
 COMMON_ALCOHOLS = {
@@ -59,190 +67,140 @@ REACTION_TYPES = {
     'kolbe': 'Kolbe Reaction'
 }
 
+# Reaction rules indexed by (substrate_class, reaction_type, catalyst), validated against the templates
+REACTION_RULES = load_rules(templates=TEMPLATE_SMARTS)
+
+# Parsed molecules and canonical SMILES, interned once per worker
+MOLECULE_REGISTRY = MoleculeRegistry(max_entries=int(os.environ.get('MOLECULE_REGISTRY_MAX_ENTRIES', 2048)))
+
+def normalize_compound(compound):
+    """Lower-case common alcohol names; leave SMILES untouched since case is significant"""
+    compound = compound.strip()
+    if compound.lower() in COMMON_ALCOHOLS:
+        return compound.lower()
+    return compound
+
+def resolve_compound(compound):
+    """Return (mol, canonical_smiles) for a common name or SMILES, or (None, None)"""
+    compound = normalize_compound(compound)
+    smiles = COMMON_ALCOHOLS.get(compound, compound)
+    # Oversized input never reaches the parser
+    if check_smiles(smiles) is not None:
+        return None, None
+    return MOLECULE_REGISTRY.get(smiles)
+
+def check_compound(compound):
+    """Return an error message if a name or SMILES is over the input limits, else None"""
+    compound = normalize_compound(compound)
+    return admission_error(COMMON_ALCOHOLS.get(compound, compound))
+
 def get_mol_from_name(compound_name):
     """Convert a compound name to an RDKit molecule"""
-    compound_name = compound_name.lower().strip()
-    
-    # Check if it's in our common alcohols
-    if compound_name in COMMON_ALCOHOLS:
-        smiles = COMMON_ALCOHOLS[compound_name]
-        return Chem.MolFromSmiles(smiles)
-    
-    # Try to parse as SMILES
-    try:
-        mol = Chem.MolFromSmiles(compound_name)
-        if mol:
-            return mol
-    except:
-        pass
-    
-    # If we can't identify the compound
-    return None
+    mol, _ = resolve_compound(compound_name)
+    return mol
+
+# Canonical SMILES -> substrate class used for rule lookup, so repeats skip the substructure matches
+SUBSTRATE_CLASSES = LRUCache(max_entries=int(os.environ.get('SUBSTRATE_CLASS_CACHE_MAX_ENTRIES', 2048)))
+
+def substrate_class_of(mol, canonical_smiles):
+    """Rule-table substrate class of a parsed alcohol or phenol"""
+    substrate_class = SUBSTRATE_CLASSES.get(canonical_smiles)
+    if substrate_class is None:
+        # Phenol itself has dedicated rules; substituted phenols use the templates
+        if is_phenol(mol):
+            substrate_class = 'parent_phenol'
+        else:
+            substrate_class = classify_alcohol(mol) or 'unclassified'
+        SUBSTRATE_CLASSES.set(canonical_smiles, substrate_class)
+    return substrate_class
+
+def get_registry_stats():
+    """Return parse counters for the molecule registry"""
+    return MOLECULE_REGISTRY.stats()
+
+def _create_svg_cache():
+    """Build the shared SVG cache from environment configuration"""
+    cache_dir = os.environ.get('SVG_CACHE_DIR')
+    return LRUCache(
+        max_entries=int(os.environ.get('SVG_CACHE_MAX_ENTRIES', 512)),
+        max_bytes=int(os.environ.get('SVG_CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+        store=FileStore(
+            cache_dir, suffix='.svg',
+            max_entries=int(os.environ.get('SVG_CACHE_DIR_MAX_ENTRIES', 20000)),
+            max_bytes=int(os.environ.get('SVG_CACHE_DIR_MAX_BYTES', 256 * 1024 * 1024))
+        ) if cache_dir else None
+    )
+
+# Rendered depictions keyed on canonical SMILES and canvas size, shared across requests
+SVG_CACHE = _create_svg_cache()
 
 def get_mol_svg(compound, width=300, height=200):
     """Generate SVG for a molecule"""
-    # Check if it's a SMILES string first
-    try:
-        mol = Chem.MolFromSmiles(compound)
-        if not mol:
-            mol = get_mol_from_name(compound)
-    except:
-        mol = get_mol_from_name(compound)
+    mol, canonical_smiles = resolve_compound(compound)
     
     if not mol:
         return f"<div class='text-danger'>Could not parse: {compound}</div>"
     
-    # Generate 2D coordinates if they don't exist
-    if not mol.GetNumConformers():
-        AllChem.Compute2DCoords(mol)
+    cache_key = f"{canonical_smiles}|{width}x{height}"
+    svg = SVG_CACHE.get(cache_key)
+    if svg is not None:
+        return svg
     
-    # Draw the molecule
-    drawer = rdMolDraw2D.MolDraw2DSVG(width, height)
-    drawer.DrawMolecule(mol)
-    drawer.FinishDrawing()
-    svg = drawer.GetDrawingText()
+    # Structures too large or too slow to draw are returned as SMILES only
+    if not can_depict(canonical_smiles):
+        return ''
     
-    return svg
-
-def oxidize_alcohol(mol):
-    """Oxidation reaction for alcohols"""
-    smiles = Chem.MolToSmiles(mol)
-    # Check for primary alcohol (RCH₂OH)
-    if 'CO' in smiles and not 'C(C)(C)O' in smiles:
-        # Primary alcohols oxidize to aldehydes/carboxylic acids
-        if smiles == 'CO':  # Methanol
-            return 'O=C=O', 'Methanol is fully oxidized to CO₂ and H₂O'
-        else:
-            # Replace terminal CH₂OH with CHO (aldehyde)
-            aldehyde_smiles = smiles.replace('CO', 'C=O')
-            # Further oxidation to carboxylic acid
-            acid_smiles = smiles.replace('CO', 'C(=O)O')
-            return acid_smiles, 'Primary alcohol oxidizes first to aldehyde then to carboxylic acid'
+    def draw():
+        # The drawing modules roughly double RDKit's import time, so load them on first use
+        from rdkit.Chem import rdDepictor
+        from rdkit.Chem.Draw import rdMolDraw2D
+        # Interned molecules are shared, so lay out a private copy
+        copy = Chem.Mol(mol)
+        rdDepictor.Compute2DCoords(copy)
+        drawer = rdMolDraw2D.MolDraw2DSVG(width, height)
+        drawer.DrawMolecule(copy)
+        drawer.FinishDrawing()
+        return drawer.GetDrawingText()
     
-    # Check for secondary alcohol (R₂CHOH)
-    elif 'C(C)O' in smiles or 'C(CC)O' in smiles:
-        # Secondary alcohols oxidize to ketones
-        ketone_smiles = smiles.replace('C(C)O', 'C(C)=O').replace('C(CC)O', 'C(CC)=O')
-        return ketone_smiles, 'Secondary alcohol oxidizes to ketone'
-    
-    # Tertiary alcohols (R₃COH) don't easily oxidize
-    elif 'C(C)(C)O' in smiles:
-        return '', 'Tertiary alcohols are resistant to oxidation under normal conditions'
-    
-    # Phenol
-    elif 'c1ccccc1O' in smiles:
-        return '', 'Phenols undergo complex oxidation reactions depending on conditions'
-    
-    return '', 'Oxidation pathway not determined'
+    svg = timed_depiction(canonical_smiles, draw)
+    if svg is None:
+        return ''
+    SVG_CACHE.set(cache_key, svg)
+    return svg
 
-def dehydrate_alcohol(mol):
-    """Dehydration reaction for alcohols"""
-    smiles = Chem.MolToSmiles(mol)
-    
-    # Handle specific alcohols
-    if smiles == 'CC(C)(C)O':  # tert-butanol
-        return 'C=C(C)C', 'tert-Butanol undergoes dehydration to form 2-methylpropene (isobutylene)'
-    
-    # Simple primary alcohols (except methanol)
-    elif 'CCO' in smiles and not 'C(C)(C)O' in smiles and smiles != 'CO':
-        alkene_smiles = smiles.replace('CCO', 'C=C')
-        return alkene_smiles, 'Alcohol undergoes dehydration to form an alkene'
-    
-    # Secondary alcohols
-    elif smiles == 'CC(C)O':  # isopropanol
-        return 'C=CC', 'Isopropanol undergoes dehydration to form propene'
-    elif 'C(C)O' in smiles:
-        alkene_smiles = smiles.replace('C(C)O', 'C=C')
-        return alkene_smiles, 'Secondary alcohol dehydrates to form an alkene'
-    
-    # Methanol can't undergo typical dehydration
-    elif smiles == 'CO':
-        return '', 'Methanol cannot undergo typical dehydration as it lacks a β-hydrogen'
-    
-    # Phenol
-    elif 'c1ccccc1O' in smiles:
-        return '', "Phenols generally don't undergo simple dehydration reactions"
-    
-    return '', 'Dehydration pathway not determined'
+def get_svg_cache_stats():
+    """Return hit/miss counters for the SVG cache"""
+    return SVG_CACHE.stats()
 
-def halogenate_alcohol(mol, catalyst):
-    """Halogenation reaction for alcohols"""
-    smiles = Chem.MolToSmiles(mol)
-    
-    halogen = ''
-    if catalyst.lower() in ['hcl', 'socl2', 'pcl5']:
-        halogen = 'Cl'
-        halogen_name = 'chloride'
-    elif catalyst.lower() in ['hbr', 'pbr3']:
-        halogen = 'Br'
-        halogen_name = 'bromide'
-    elif catalyst.lower() in ['hi', 'pi3']:
-        halogen = 'I'
-        halogen_name = 'iodide'
-    else:
-        return '', 'Please specify a halogenating agent (HCl, HBr, HI, SOCl₂, etc.)'
-    
-    # Handle specific alcohols
-    if smiles == 'CC(C)O':  # isopropanol
-        if halogen == 'Cl':
-            return 'CC(C)Cl', f'Isopropanol reacts with {catalyst} to form isopropyl chloride'
-        elif halogen == 'Br':
-            return 'CC(C)Br', f'Isopropanol reacts with {catalyst} to form isopropyl bromide'
-        elif halogen == 'I':
-            return 'CC(C)I', f'Isopropanol reacts with {catalyst} to form isopropyl iodide'
-    
-    elif smiles == 'CC(C)(C)O':  # tert-butanol
-        if halogen == 'Cl':
-            return 'CC(C)(C)Cl', f'tert-Butanol reacts with {catalyst} to form tert-butyl chloride'
-        elif halogen == 'Br':
-            return 'CC(C)(C)Br', f'tert-Butanol reacts with {catalyst} to form tert-butyl bromide'
-        elif halogen == 'I':
-            return 'CC(C)(C)I', f'tert-Butanol reacts with {catalyst} to form tert-butyl iodide'
-    
-    # Generic alcohol halogenation
-    elif 'CO' in smiles:
-        halogenated_smiles = smiles.replace('O', halogen)
-        return halogenated_smiles, f'Alcohol is converted to alkyl {halogen_name}'
-    
-    # Phenol
-    elif 'c1ccccc1O' in smiles:
-        return '', 'Phenols undergo different halogenation pathways, typically at the ring positions'
-    
-    return '', 'Halogenation pathway not determined'
+def apply_rule(substrate_class, reaction_type, catalyst, mol):
+    """Look up the rule for a combination and return (product_smiles, details, error)"""
+    rule = REACTION_RULES.lookup(substrate_class, reaction_type, catalyst)
+    if rule is None:
+        return '', '', REACTION_RULES.unsupported_message(substrate_class, reaction_type)
+    if rule.error:
+        return '', '', rule.error
 
-def esterify_alcohol(mol):
-    """Esterification reaction for alcohols with acetic acid"""
-    smiles = Chem.MolToSmiles(mol)
-    
-    # Handle specific alcohols
-    if smiles == 'CC(C)O':  # isopropanol
-        return 'CC(C)OC(=O)C', 'Isopropanol reacts with acetic acid to form isopropyl acetate'
-        
-    elif smiles == 'CC(C)(C)O':  # tert-butanol
-        return 'CC(C)(C)OC(=O)C', 'tert-Butanol reacts with acetic acid to form tert-butyl acetate'
-    
-    # Replace OH with OC(=O)C for acetate ester for other alcohols
-    elif 'CO' in smiles:
-        ester_smiles = smiles.replace('O', 'OC(=O)C')
-        return ester_smiles, 'Alcohol reacts with acetic acid to form an acetate ester'
-    
-    # Phenol
-    elif 'c1ccccc1O' in smiles:
-        ester_smiles = 'CC(=O)Oc1ccccc1'
-        return ester_smiles, 'Phenol reacts with acetic acid to form phenyl acetate'
-    
-    return '', 'Esterification pathway not determined'
+    details = rule.details.format(catalyst=catalyst)
+    product_smiles = rule.product
+    if rule.template:
+        product_smiles = apply_template(rule.template, substrate_class, mol, rule.variant)
+        if not product_smiles:
+            return '', '', rule.no_product or details
+    return product_smiles, details, ''
 
 def predict_reaction(compound, catalyst, reaction_type):
     """Predict the products of alcohol/phenol reactions"""
     try:
+        error = check_compound(compound)
+        if error:
+            return {
+                'success': False,
+                'error': error
+            }
+        
         # Convert compound names to SMILES for RDKit processing
-        if compound.lower() in COMMON_ALCOHOLS:
-            smiles = COMMON_ALCOHOLS[compound.lower()]
-            mol = Chem.MolFromSmiles(smiles)
-        else:
-            # Try to interpret as SMILES directly
-            mol = Chem.MolFromSmiles(compound)
+        with STAGE_SECONDS.time(stage='parse'):
+            mol, canonical_smiles = resolve_compound(compound)
             
         if not mol:
             return {
@@ -250,153 +208,23 @@ def predict_reaction(compound, catalyst, reaction_type):
                 'error': f"Couldn't recognize or parse the compound: {compound}"
             }
         
-        # Get canonical SMILES from the molecule for consistency
-        smiles = Chem.MolToSmiles(mol)
-        
         # Check if the molecule contains an alcohol group
-        if 'O' not in smiles and 'OH' not in smiles:
+        if not is_alcohol(mol):
             return {
                 'success': False,
                 'error': f"The compound doesn't appear to be an alcohol or phenol: {compound}"
             }
         
-        # Check if it's phenol
-        is_phenol = smiles == 'c1ccccc1O' or smiles == 'Oc1ccccc1'
-        
-        # Different reaction pathways
-        product_smiles = ''
-        details = ''
-        
-        # Phenol-specific reactions
-        if is_phenol:
-            if reaction_type == 'oxidation':
-                if catalyst.lower() in ['k2cr2o7', 'kmno4']:
-                    product_smiles = 'O=C1C=CC(=O)C=C1'  # Benzoquinone
-                    details = 'Phenol undergoes oxidation to form benzoquinone under strong oxidizing conditions'
-                else:
-                    return {
-                        'success': False,
-                        'error': "Phenol oxidation requires a strong oxidizing agent like K₂Cr₂O₇ or KMnO₄"
-                    }
-            elif reaction_type == 'halogenation':
-                if catalyst.lower() in ['hcl', 'hbr', 'hi', 'socl2']:
-                    # Electrophilic aromatic substitution occurs at ortho/para positions
-                    halogen = ''
-                    halogen_name = 'halophenol'  # Default value
-                    
-                    if catalyst.lower() == 'hcl' or catalyst.lower() == 'socl2':
-                        halogen = 'Cl'
-                        halogen_name = 'chlorophenol'
-                    elif catalyst.lower() == 'hbr':
-                        halogen = 'Br'
-                        halogen_name = 'bromophenol'
-                    elif catalyst.lower() == 'hi':
-                        halogen = 'I'
-                        halogen_name = 'iodophenol'
-                    
-                    # 2,4,6-trihalogenated phenol is typically the major product
-                    product_smiles = ''  # Default empty value
-                    if halogen == 'Cl':
-                        product_smiles = 'Oc1c(Cl)cc(Cl)cc1Cl'  # 2,4,6-trichlorophenol
-                    elif halogen == 'Br':
-                        product_smiles = 'Oc1c(Br)cc(Br)cc1Br'  # 2,4,6-tribromophenol
-                    elif halogen == 'I':
-                        product_smiles = 'Oc1c(I)cc(I)cc1I'  # 2,4,6-triiodophenol
-                    
-                    reaction_details = ""
-                    if catalyst.lower() == 'socl2':
-                        reaction_details = "SOCl₂ acts as a chlorinating agent with phenol, primarily attacking the aromatic ring at ortho and para positions due to the activating effect of the hydroxyl group. "
-                    
-                    details = f'Phenol undergoes halogenation to form multiple {halogen_name} products, with 2,4,6-tri{halogen_name} as the major product. {reaction_details}'
-                else:
-                    return {
-                        'success': False,
-                        'error': "Phenol halogenation requires a halogen donor like HCl, HBr, HI, or SOCl₂"
-                    }
-            elif reaction_type == 'esterification':
-                if catalyst.lower() in ['h2so4', 'h3po4']:
-                    product_smiles = 'CC(=O)Oc1ccccc1'  # Phenyl acetate
-                    details = 'Phenol reacts with acetic acid to form phenyl acetate in the presence of an acid catalyst'
-                else:
-                    return {
-                        'success': False,
-                        'error': "Phenol esterification requires an acid catalyst like H₂SO₄ or H₃PO₄"
-                    }
-            elif reaction_type == 'dehydration':
-                return {
-                    'success': False,
-                    'error': "Phenol doesn't undergo typical dehydration reactions like aliphatic alcohols. The aromatic ring stabilizes the C-O bond."
-                }
-            elif reaction_type == 'kolbe':
-                if catalyst.lower() in ['naoh', 'koh', 'naco2', 'khco3', 'co2']:
-                    # Kolbe-Schmitt reaction (carboxylation of phenol)
-                    product_smiles = 'OC(=O)c1ccccc1O'  # Salicylic acid
-                    details = 'Phenol undergoes the Kolbe-Schmitt reaction with carbon dioxide under basic conditions to form salicylic acid (2-hydroxybenzoic acid). Elevated temperature and pressure are usually required. This reaction occurs primarily at the ortho position due to the directing effect of the hydroxyl group.'
-                    return {
-                        'success': True,
-                        'product': product_smiles,
-                        'details': details
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': "The Kolbe-Schmitt reaction requires basic conditions (NaOH, KOH) and carbon dioxide."
-                    }
-        else:
-            # Regular alcohol reactions
-            if reaction_type == 'oxidation':
-                if catalyst.lower() in ['k2cr2o7', 'kmno4', 'pcc']:
-                    product_smiles, details = oxidize_alcohol(mol)
-                else:
-                    return {
-                        'success': False,
-                        'error': "Oxidation typically requires an oxidizing agent like K₂Cr₂O₇, KMnO₄, or PCC"
-                    }
-                    
-            elif reaction_type == 'dehydration':
-                if catalyst.lower() in ['h2so4', 'h3po4', 'heat']:
-                    product_smiles, details = dehydrate_alcohol(mol)
-                else:
-                    return {
-                        'success': False,
-                        'error': "Dehydration typically requires an acid catalyst like H₂SO₄ or H₃PO₄, or heat"
-                    }
-                    
-            elif reaction_type == 'halogenation':
-                product_smiles, details = halogenate_alcohol(mol, catalyst)
-                
-            elif reaction_type == 'esterification':
-                if catalyst.lower() in ['h2so4', 'h3po4']:
-                    product_smiles, details = esterify_alcohol(mol)
-                else:
-                    return {
-                        'success': False,
-                        'error': "Esterification typically requires an acid catalyst like H₂SO₄"
-                    }
-            
-            else:
-                return {
-                    'success': False,
-                    'error': f"Reaction type '{reaction_type}' not supported yet"
-                }
-        
+        substrate_class = substrate_class_of(mol, canonical_smiles)
+        product_smiles, details, error = apply_rule(substrate_class, reaction_type, catalyst, mol)
         if not product_smiles:
             return {
                 'success': False,
-                'error': details or "Couldn't determine reaction product"
+                'error': error or "Couldn't determine reaction product"
             }
             
-        # Try to convert SMILES to a more readable name
-        try:
-            product_mol = Chem.MolFromSmiles(product_smiles)
-            if product_mol:
-                return {
-                    'success': True,
-                    'product': product_smiles,
-                    'details': details
-                }
-        except Exception as e:
-            logging.error(f"Error converting product SMILES: {str(e)}")
+        # Intern the product so its depiction doesn't parse it again
+        MOLECULE_REGISTRY.get(product_smiles)
             
         return {
             'success': True,
@@ -411,6 +239,97 @@ def predict_reaction(compound, catalyst, reaction_type):
             'error': f"An error occurred: {str(e)}"
         }
 
+def build_prediction(compound, catalyst, reaction_type, render_svg=True):
+    """Run a prediction and attach structure depictions for the /predict response"""
+    compound = normalize_compound(compound)
+    with STAGE_SECONDS.time(stage='predict'):
+        result = predict_reaction(compound, catalyst, reaction_type)
+    
+    if not result['success']:
+        return result
+    
+    prediction = {
+        'success': True,
+        'reactant': compound,
+        'catalyst': catalyst,
+        'reaction_type': reaction_type,
+        'product': result['product'],
+        'reaction_details': result['details']
+    }
+    
+    if render_svg:
+        # Use SMILES directly if available to avoid parsing errors
+        reactant_smiles = COMMON_ALCOHOLS.get(compound, compound)
+        with STAGE_SECONDS.time(stage='depict_reactant'):
+            prediction['reactant_svg'] = get_mol_svg(reactant_smiles)
+        with STAGE_SECONDS.time(stage='depict_product'):
+            prediction['product_svg'] = get_mol_svg(result['product']) if result['product'] else ''
+    
+    return prediction
+
+# Batches smaller than this run inline; pool start-up would cost more than it saves
+BATCH_PARALLEL_THRESHOLD = int(os.environ.get('BATCH_PARALLEL_THRESHOLD', 32))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 0)) or os.cpu_count() or 1
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def _get_batch_pool():
+    """Create the batch process pool on first use so forked workers each get their own"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_MAX_WORKERS)
+        return _batch_pool
+
+def _predict_batch_item(args):
+    """Process-pool entry point for a single batch item"""
+    compound, catalyst, reaction_type, render_svg = args
+    try:
+        return build_prediction(compound, catalyst, reaction_type, render_svg=render_svg)
+    except Exception as e:
+        logging.error(f"Error in batch prediction: {str(e)}")
+        return {
+            'success': False,
+            'error': f"An error occurred: {str(e)}"
+        }
+
+def predict_reactions_batch(items, render_svg=True, max_workers=None):
+    """Predict a list of (compound, catalyst, reaction_type) triples, preserving order"""
+    keys = [(normalize_compound(compound), catalyst, reaction_type) for compound, catalyst, reaction_type in items]
+    
+    # Each distinct triple is computed once, however often it appears
+    unique_keys = list(dict.fromkeys(keys))
+    
+    # Oversized structures are rejected here so they are counted in this process
+    by_key = {}
+    for key in unique_keys:
+        error = check_compound(key[0])
+        if error:
+            by_key[key] = {'success': False, 'error': error}
+    unique_keys = [key for key in unique_keys if key not in by_key]
+    work = [key + (render_svg,) for key in unique_keys]
+    
+    workers = max_workers or BATCH_MAX_WORKERS
+    if len(work) < BATCH_PARALLEL_THRESHOLD or workers == 1:
+        results = [_predict_batch_item(args) for args in work]
+    else:
+        # A private pool is only created when the caller asks for a specific size
+        pool = _get_batch_pool() if max_workers is None else ProcessPoolExecutor(max_workers=workers)
+        try:
+            chunksize = max(1, len(work) // (4 * workers))
+            # Stage timings recorded in the pool processes are replayed here
+            results = []
+            for result, observations in pool.map(partial(run_captured, _predict_batch_item), work, chunksize=chunksize):
+                replay(observations)
+                results.append(result)
+        finally:
+            if max_workers is not None:
+                pool.shutdown()
+    
+    by_key.update(zip(unique_keys, results))
+    return [by_key[key] for key in keys]
+
 def get_common_alcohols():
     """Return a list of common alcohols for suggestions"""
     return sorted(list(COMMON_ALCOHOLS.keys()))
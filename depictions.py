@@ -0,0 +1,166 @@
+"""Content-addressed structure depictions served as immutable assets.
+
+A depiction is identified by a hash of its canonical SMILES and canvas
+size, so the same structure always has the same URL and browsers or CDNs
+can cache it forever. The URL also carries the SMILES (and any non-default
+size) as query parameters; any instance can check them against the id and
+render the asset without having seen it before. A bounded id -> SMILES
+index, shared between workers through SQLite, still resolves bare ids.
+Rendered bytes, including gzip and (when the optional ``brotli`` package
+is installed) brotli variants, are cached per worker.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+
+from rdkit import Chem
+
+from caching import LRUCache, SQLiteStore
+from chemistry_utils import get_mol_svg, resolve_compound
+from guardrails import can_depict, mark_slow_depiction, timed_depiction
+from metrics import STAGE_SECONDS
+from offload import WorkTimeout
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+DEFAULT_WIDTH = 300
+DEFAULT_HEIGHT = 200
+MINIFY_SVG = os.environ.get('DEPICTION_MINIFY', 'true').lower() != 'false'
+
+_index_path = os.environ.get(
+    'DEPICTION_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'chemreact_depictions.sqlite3'))
+
+# depiction id -> {"smiles", "width", "height"}
+DEPICTION_INDEX = LRUCache(
+    max_entries=int(os.environ.get('DEPICTION_INDEX_MAX_ENTRIES', 8192)),
+    store=SQLiteStore(
+        _index_path, table='depictions',
+        max_entries=int(os.environ.get('DEPICTION_INDEX_STORE_MAX_ENTRIES', 50000))
+    ) if _index_path else None
+)
+
+# (depiction id, format, encoding) -> bytes
+DEPICTION_ASSETS = LRUCache(
+    max_entries=int(os.environ.get('DEPICTION_ASSET_MAX_ENTRIES', 2048)),
+    max_bytes=int(os.environ.get('DEPICTION_ASSET_MAX_BYTES', 32 * 1024 * 1024))
+)
+
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_XML_DECLARATION = re.compile(r'<\?xml[^>]*\?>')
+_CLASS_ATTRIBUTE = re.compile(r" class='[^']*'")
+_BETWEEN_TAGS = re.compile(r'>\s+<')
+_WHITESPACE = re.compile(r'\s+')
+
+def minify_svg(svg):
+    """Strip the XML declaration, comments, element classes and redundant whitespace"""
+    svg = _XML_DECLARATION.sub('', svg)
+    svg = _COMMENT.sub('', svg)
+    svg = _CLASS_ATTRIBUTE.sub('', svg)
+    svg = _BETWEEN_TAGS.sub('><', svg)
+    return _WHITESPACE.sub(' ', svg).strip()
+
+def depiction_id(canonical_smiles, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    """Content address for a structure drawn at a given size"""
+    return hashlib.sha256(f"{canonical_smiles}|{width}x{height}".encode('utf-8')).hexdigest()[:24]
+
+def depiction_params(compound, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    """URL parameters of a name or SMILES's depiction (id, SMILES and any non-default size), or None"""
+    _, canonical_smiles = resolve_compound(compound)
+    if canonical_smiles is None or not can_depict(canonical_smiles):
+        return None
+    key = depiction_id(canonical_smiles, width, height)
+    if DEPICTION_INDEX.get(key) is None:
+        DEPICTION_INDEX.set(key, json.dumps({'smiles': canonical_smiles, 'width': width, 'height': height}))
+    params = {'depiction_id': key, 'smiles': canonical_smiles}
+    if (width, height) != (DEFAULT_WIDTH, DEFAULT_HEIGHT):
+        params.update(width=width, height=height)
+    return params
+
+def register_depiction(compound, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    """Return the depiction id for a name or SMILES, or None if it doesn't parse"""
+    params = depiction_params(compound, width, height)
+    return params['depiction_id'] if params else None
+
+def _entry(key, smiles=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    """What to draw for an id: the URL's own parameters if they hash to it, else the shared index"""
+    if smiles and depiction_id(smiles, width, height) == key:
+        return {'smiles': smiles, 'width': width, 'height': height}
+    entry = DEPICTION_INDEX.get(key)
+    return json.loads(entry) if entry is not None else None
+
+def _render_png(smiles, width, height):
+    from rdkit.Chem import rdDepictor
+    from rdkit.Chem.Draw import rdMolDraw2D
+    mol, _ = resolve_compound(smiles)
+    mol = Chem.Mol(mol)
+    rdDepictor.Compute2DCoords(mol)
+    drawer = rdMolDraw2D.MolDraw2DCairo(width, height)
+    drawer.DrawMolecule(mol)
+    drawer.FinishDrawing()
+    return drawer.GetDrawingText()
+
+def render_depiction(smiles, width, height, fmt='svg'):
+    """Render a structure as SVG or PNG bytes, or None if it can't be drawn"""
+    try:
+        if fmt == 'png':
+            if not can_depict(smiles):
+                return None
+            return timed_depiction(smiles, lambda: _render_png(smiles, width, height))
+        svg = get_mol_svg(smiles, width, height)
+        if not svg:
+            return None
+        return (minify_svg(svg) if MINIFY_SVG else svg).encode('utf-8')
+    except Exception as e:
+        logging.error(f"Error rendering depiction of {smiles}: {str(e)}")
+        return None
+
+def get_depiction(key, fmt='svg', encoding=None, runner=None, smiles=None, width=DEFAULT_WIDTH,
+                  height=DEFAULT_HEIGHT):
+    """Return the asset bytes for a depiction id, or None if the id is unknown.
+
+    encoding may be None, 'gzip' or 'br'; compressed variants are produced
+    once and kept alongside the plain bytes. runner(fn, *args) is used for
+    the rendering call, e.g. an offload pool's run method. smiles, width
+    and height are the URL's parameters; they are only trusted if they hash
+    to key.
+    """
+    cache_key = f"{key}|{fmt}|{encoding or 'identity'}"
+    data = DEPICTION_ASSETS.get(cache_key)
+    if data is not None:
+        return data
+
+    if encoding:
+        plain = get_depiction(key, fmt, runner=runner, smiles=smiles, width=width, height=height)
+        if plain is None:
+            return None
+        if encoding == 'br':
+            data = brotli.compress(plain, quality=11)
+        else:
+            data = gzip.compress(plain, compresslevel=9, mtime=0)
+    else:
+        entry = _entry(key, smiles, width, height)
+        if entry is None:
+            return None
+        args = (entry['smiles'], entry['width'], entry['height'], fmt)
+        try:
+            with STAGE_SECONDS.time(stage='depict_asset'):
+                data = runner(render_depiction, *args) if runner else render_depiction(*args)
+        except WorkTimeout:
+            mark_slow_depiction(entry['smiles'])
+            raise
+        if data is None:
+            return None
+
+    DEPICTION_ASSETS.set(cache_key, data)
+    return data
+
+def supported_encodings():
+    """Content encodings that can be served, best first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
@@ -0,0 +1,84 @@
+"""Molecular descriptors for reactants and products.
+
+A list of names or SMILES is resolved through the molecule registry and
+turned into columns: the canonical SMILES plus one NumPy array per
+descriptor, with NaN for anything that doesn't parse. Each structure's
+descriptors are computed once per worker and cached by canonical SMILES, so
+a repeated reactant or product costs a dict lookup.
+"""
+import math
+import os
+
+import numpy as np
+
+from caching import LRUCache
+from chemistry_utils import resolve_compound
+from metrics import STAGE_SECONDS
+
+# Molecular weight, Crippen logP, topological polar surface area, H-bond donors and acceptors
+DESCRIPTORS = ('mw', 'logp', 'tpsa', 'hbd', 'hba')
+COUNT_DESCRIPTORS = ('hbd', 'hba')
+
+# Canonical SMILES -> tuple of descriptor values in DESCRIPTORS order
+_CACHE = LRUCache(max_entries=int(os.environ.get('DESCRIPTOR_CACHE_MAX_ENTRIES', 8192)))
+
+def _compute(mol):
+    from rdkit.Chem import Crippen, Descriptors, rdMolDescriptors
+    return (
+        Descriptors.MolWt(mol),
+        Crippen.MolLogP(mol),
+        rdMolDescriptors.CalcTPSA(mol),
+        rdMolDescriptors.CalcNumHBD(mol),
+        rdMolDescriptors.CalcNumHBA(mol)
+    )
+
+def descriptor_table(compounds):
+    """Descriptor columns for a list of names or SMILES: 'smiles' plus one float array per descriptor"""
+    values = np.full((len(compounds), len(DESCRIPTORS)), np.nan)
+    canonicals = []
+    with STAGE_SECONDS.time(stage='descriptors'):
+        for row, compound in enumerate(compounds):
+            mol, canonical = resolve_compound(compound) if compound else (None, None)
+            canonicals.append(canonical)
+            if mol is None:
+                continue
+            cached = _CACHE.get(canonical)
+            if cached is None:
+                cached = _compute(mol)
+                _CACHE.set(canonical, cached)
+            values[row] = cached
+    columns = {'smiles': canonicals}
+    columns.update({name: values[:, index] for index, name in enumerate(DESCRIPTORS)})
+    return columns
+
+def delta_mw(reactants, products):
+    """Product minus reactant molecular weight, row by row"""
+    return products['mw'] - reactants['mw']
+
+def _json_value(name, value):
+    if math.isnan(value):
+        return None
+    return int(value) if name in COUNT_DESCRIPTORS else round(float(value), 3)
+
+def columns_to_json(columns):
+    """Plain lists for a JSON response, with None in place of NaN"""
+    return {
+        name: list(values) if name == 'smiles' else [_json_value(name, value) for value in values]
+        for name, values in columns.items()
+    }
+
+def prediction_descriptors(reactant, product):
+    """Descriptors of both sides of a prediction and the change in molecular weight"""
+    columns = descriptor_table([reactant, product])
+    reactant_values, product_values = (
+        {name: _json_value(name, columns[name][row]) for name in DESCRIPTORS} for row in (0, 1)
+    )
+    return {
+        'reactant': reactant_values,
+        'product': product_values,
+        'delta_mw': _json_value('delta_mw', columns['mw'][1] - columns['mw'][0])
+    }
+
+def get_descriptor_cache_stats():
+    """Return hit/miss counters for the descriptor cache"""
+    return _CACHE.stats()
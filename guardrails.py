@@ -0,0 +1,121 @@
+"""Admission limits for free-form structures.
+
+SMILES are sized up with a regex scan before RDKit ever sees them, so an
+oversized polymer is turned away without a parse, a 2D layout or a draw
+call. Depiction has a tighter atom limit and a time budget; structures over
+either are returned as SMILES only. Every rejection is counted by reason in
+chemreact_rejections_total, which is replayed from offload pool processes
+like any other metric.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from caching import LRUCache
+from metrics import REJECTIONS
+
+MAX_SMILES_LENGTH = int(os.environ.get('GUARD_MAX_SMILES_LENGTH', 500))
+MAX_ATOMS = int(os.environ.get('GUARD_MAX_ATOMS', 150))
+MAX_RINGS = int(os.environ.get('GUARD_MAX_RINGS', 20))
+DEPICTION_MAX_ATOMS = int(os.environ.get('GUARD_DEPICTION_MAX_ATOMS', 100))
+DEPICTION_TIME_BUDGET = float(os.environ.get('GUARD_DEPICTION_TIME_BUDGET', 2.0))
+DEPICTION_THREADS = int(os.environ.get('GUARD_DEPICTION_THREADS', 4))
+
+REJECTION_MESSAGES = {
+    'length': f'SMILES longer than {MAX_SMILES_LENGTH} characters are not accepted',
+    'atoms': f'Structures with more than {MAX_ATOMS} atoms are not accepted',
+    'rings': f'Structures with more than {MAX_RINGS} rings are not accepted'
+}
+
+# Bracket atoms, the organic subset (two-letter halogens first) and ring-closure labels
+_SMILES_TOKEN = re.compile(r'\[[^\]]*\]|Br|Cl|[BCNOPSFI]|[bcnops*]|%\d{2}|\d')
+
+_draw_executor = None
+_draw_executor_pid = None
+_draw_executor_lock = threading.Lock()
+
+# Canonical SMILES whose depiction already blew the time budget once
+_SLOW_DEPICTIONS = LRUCache(max_entries=4096)
+
+def estimate_size(smiles):
+    """Count (atoms, rings) from the SMILES text without parsing it"""
+    atoms = 0
+    closures = 0
+    for token in _SMILES_TOKEN.findall(smiles):
+        if token[0] == '%' or token.isdigit():
+            closures += 1
+        else:
+            atoms += 1
+    # Each ring-closure bond is written twice, once at each end
+    return atoms, closures // 2
+
+def check_smiles(smiles):
+    """Return the rejection reason for a SMILES string, or None if it is admitted"""
+    if len(smiles) > MAX_SMILES_LENGTH:
+        return 'length'
+    atoms, rings = estimate_size(smiles)
+    if atoms > MAX_ATOMS:
+        return 'atoms'
+    if rings > MAX_RINGS:
+        return 'rings'
+    return None
+
+def record_rejection(reason):
+    """Count a rejected input or skipped depiction"""
+    REJECTIONS.inc(reason=reason)
+
+def admission_error(smiles):
+    """Check a SMILES string and count it if rejected; returns an error message or None"""
+    reason = check_smiles(smiles)
+    if reason is None:
+        return None
+    record_rejection(reason)
+    return REJECTION_MESSAGES[reason]
+
+def can_depict(canonical_smiles):
+    """Whether a structure should be drawn or returned as SMILES only"""
+    if _SLOW_DEPICTIONS.get(canonical_smiles) is not None:
+        record_rejection('depiction_budget')
+        return False
+    if estimate_size(canonical_smiles)[0] > DEPICTION_MAX_ATOMS:
+        record_rejection('depiction_atoms')
+        return False
+    return True
+
+def mark_slow_depiction(canonical_smiles):
+    """Stop drawing a structure whose depiction exceeded the time budget"""
+    _SLOW_DEPICTIONS.set(canonical_smiles, '1')
+
+def _draw_pool():
+    global _draw_executor, _draw_executor_pid
+    # A pool inherited through fork has no live threads, so each process makes its own
+    with _draw_executor_lock:
+        if _draw_executor is None or _draw_executor_pid != os.getpid():
+            _draw_executor = ThreadPoolExecutor(max_workers=DEPICTION_THREADS, thread_name_prefix='depict')
+            _draw_executor_pid = os.getpid()
+        return _draw_executor
+
+def timed_depiction(canonical_smiles, draw):
+    """Call draw() within the time budget; returns None if the budget ran out.
+
+    The draw runs on a small thread pool so the caller can stop waiting. A
+    thread can't be interrupted, so an overrun draw finishes in the
+    background and the structure is never drawn again.
+    """
+    future = _draw_pool().submit(draw)
+    try:
+        return future.result(timeout=DEPICTION_TIME_BUDGET)
+    except FutureTimeoutError:
+        if future.cancel():
+            # Never started: every draw thread was busy, which says nothing about this structure
+            record_rejection('depiction_busy')
+        else:
+            mark_slow_depiction(canonical_smiles)
+            record_rejection('depiction_slow')
+        return None
+
+def get_rejection_stats():
+    """Return rejection counts by reason"""
+    return {key[0]: count for key, count in REJECTIONS.values().items()}
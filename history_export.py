@@ -0,0 +1,300 @@
+"""Streaming export and bulk import of saved reactions.
+
+Exports read the Reaction table through a server-side cursor in chunks of
+EXPORT_CHUNK_SIZE rows and encode each chunk as it arrives, so memory stays
+flat however large the table is. Gzipped CSV is always available; Parquet
+and Arrow IPC streams need pyarrow.
+
+Imports read the same formats back in batches. PostgreSQL loads each batch
+with COPY into a temporary table; other databases use multi-row INSERTs.
+When the target database deduplicates (HISTORY_DEDUPE), rows exported
+without a content_hash get one computed from their resolved reactant,
+catalyst and reaction type; rows whose reactant doesn't resolve stay
+unhashed. Rows whose content_hash is already stored are skipped, so
+re-importing an export is harmless for every hashed row.
+
+Examples:
+    python history_export.py export reactions.parquet
+    python history_export.py export reactions.csv.gz --reaction-type oxidation
+    python history_export.py import reactions.csv.gz
+"""
+import argparse
+import csv
+import gzip
+import io
+import logging
+import os
+import sys
+import zlib
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; gzipped CSV is always available
+    pyarrow = None
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 5000))
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+
+FORMATS = {
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+def available_formats():
+    """Export formats usable with the installed packages"""
+    return [fmt for fmt in FORMATS if fmt == 'csv.gz' or pyarrow is not None]
+
+def detect_format(path):
+    """Guess the format from a file name"""
+    for fmt in FORMATS:
+        if path.lower().endswith('.' + fmt):
+            return fmt
+    return 'csv.gz'
+
+def _columns():
+    from models import Reaction
+    return list(Reaction.__table__.columns)
+
+def _is_integer(column):
+    from sqlalchemy import Integer
+    return isinstance(column.type, Integer)
+
+def _is_datetime(column):
+    from sqlalchemy import DateTime
+    return isinstance(column.type, DateTime)
+
+def _arrow_schema(columns):
+    fields = []
+    for column in columns:
+        if _is_integer(column):
+            kind = pyarrow.int64()
+        elif _is_datetime(column):
+            kind = pyarrow.timestamp('us')
+        else:
+            kind = pyarrow.string()
+        fields.append(pyarrow.field(column.name, kind))
+    return pyarrow.schema(fields)
+
+def export_chunks(session, filters=None, fmt='csv.gz'):
+    """Yield the encoded export in pieces, reading EXPORT_CHUNK_SIZE rows at a time"""
+    from models import Reaction
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+    columns = _columns()
+    query = Reaction.__table__.select().order_by(Reaction.id)
+    for name, value in (filters or {}).items():
+        query = query.where(getattr(Reaction, name) == value)
+    result = session.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    partitions = result.partitions()
+    if fmt == 'csv.gz':
+        return _csv_chunks(columns, partitions)
+    return _arrow_chunks(columns, partitions, fmt)
+
+def _csv_chunks(columns, partitions):
+    # wbits=31 writes a gzip header, so the stream is a regular .gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow([column.name for column in columns])
+    for rows in partitions:
+        for row in rows:
+            writer.writerow(['' if value is None else value.isoformat() if isinstance(value, datetime) else value
+                             for value in row])
+        data = compressor.compress(text.getvalue().encode('utf-8'))
+        text.seek(0)
+        text.truncate()
+        if data:
+            yield data
+    yield compressor.compress(text.getvalue().encode('utf-8')) + compressor.flush()
+
+
+class _Sink:
+    """Write-only file object whose contents are drained after every batch"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_chunks(columns, partitions, fmt):
+    schema = _arrow_schema(columns)
+    sink = _Sink()
+    if fmt == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+    for rows in partitions:
+        batch = pyarrow.record_batch(list(zip(*rows)), schema=schema)
+        if fmt == 'parquet':
+            writer.write_batch(batch, row_group_size=len(rows))
+        else:
+            writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+def read_rows(path, fmt=None):
+    """Yield row dicts from an export file without loading it whole"""
+    fmt = fmt or detect_format(path)
+    if fmt == 'csv.gz':
+        opener = gzip.open if path.lower().endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as handle:
+            yield from csv.DictReader(handle)
+        return
+    if pyarrow is None:
+        raise ValueError(f"pyarrow is required to read {fmt} files")
+    if fmt == 'parquet':
+        batches = pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=IMPORT_BATCH_SIZE)
+        for batch in batches:
+            yield from batch.to_pylist()
+    else:
+        with pyarrow.OSFile(path, 'rb') as handle:
+            for batch in pyarrow.ipc.open_stream(handle):
+                yield from batch.to_pylist()
+
+def _coerce(row, columns, dedupe=True):
+    """Typed values for every importable column; ids are reassigned, hashes and fingerprints filled in"""
+    from models import stored_content_hash
+    from search import reaction_fingerprints
+    values = {}
+    for column in columns:
+        value = row.get(column.name)
+        if value == '':
+            value = None
+        if value is not None and isinstance(value, str):
+            if _is_integer(column):
+                value = int(value)
+            elif _is_datetime(column):
+                value = datetime.fromisoformat(value)
+        values[column.name] = value
+    if values.get('created_at') is None:
+        values['created_at'] = datetime.utcnow()
+    if dedupe and values.get('content_hash') is None:
+        # Without a hash ON CONFLICT never fires, so the row would be inserted again on every import
+        values['content_hash'] = stored_content_hash(
+            values.get('reactant_smiles'), values['catalyst'], values['reaction_type'], values.get('reactant'))
+    if values.get('reactant_fp') is None or values.get('product_fp') is None:
+        values.update(reaction_fingerprints(values))
+    return values
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _copy_batch(connection, table, names, batch):
+    """Load a batch with COPY, then move the rows over without clobbering stored ones"""
+    text = io.StringIO()
+    writer = csv.writer(text)
+    for values in batch:
+        writer.writerow(['' if values[name] is None else values[name] for name in names])
+    text.seek(0)
+    column_list = ', '.join(names)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table}_import AS "
+                       f"SELECT {column_list} FROM {table} WITH NO DATA")
+        cursor.execute(f"TRUNCATE {table}_import")
+        cursor.copy_expert(f"COPY {table}_import ({column_list}) FROM STDIN WITH (FORMAT csv)", text)
+        cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_import "
+                       f"ON CONFLICT (content_hash) DO NOTHING")
+        inserted = cursor.rowcount
+    finally:
+        cursor.close()
+    connection.commit()
+    return inserted
+
+def import_rows(db, rows, batch_size=IMPORT_BATCH_SIZE, dedupe=True):
+    """Insert exported rows in batches, skipping content hashes already stored; returns rows inserted.
+
+    Pass dedupe=False for a database running with HISTORY_DEDUPE=false, so
+    repeat rows without a hash are kept as they are.
+    """
+    from models import Reaction
+    columns = [column for column in _columns() if column.name != 'id']
+    names = [column.name for column in columns]
+    table = Reaction.__table__
+    dialect = db.engine.dialect.name
+    inserted = 0
+    for batch in _batches((_coerce(row, columns, dedupe) for row in rows), batch_size):
+        if dialect == 'postgresql':
+            connection = db.engine.raw_connection()
+            try:
+                inserted += _copy_batch(connection, table.name, names, batch)
+            finally:
+                connection.close()
+            continue
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table).on_conflict_do_nothing(index_elements=['content_hash'])
+        else:
+            statement = table.insert()
+        result = db.session.execute(statement, batch)
+        db.session.commit()
+        inserted += result.rowcount if result.rowcount >= 0 else len(batch)
+        logging.debug(f"Imported {inserted} reactions")
+    return inserted
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export or import saved reactions')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    export_parser = subcommands.add_parser('export', help='Write the Reaction table to a file')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the file extension')
+    for name in ('reactant', 'catalyst', 'reaction_type'):
+        export_parser.add_argument('--' + name.replace('_', '-'), dest=name)
+    import_parser = subcommands.add_parser('import', help='Load an export into the Reaction table')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the file extension')
+    import_parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+    with app.app_context():
+        if args.command == 'export':
+            filters = {name: getattr(args, name) for name in ('reactant', 'catalyst', 'reaction_type')
+                       if getattr(args, name)}
+            with open(args.path, 'wb') as handle:
+                for data in export_chunks(db.session, filters, args.format or detect_format(args.path)):
+                    handle.write(data)
+            print(f"Exported reactions to {args.path}")
+        else:
+            inserted = import_rows(db, read_rows(args.path, args.format), args.batch_size,
+                                   app.config["HISTORY_DEDUPE"])
+            print(f"Imported {inserted} reactions from {args.path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
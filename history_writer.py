@@ -0,0 +1,134 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from metrics import STAGE_SECONDS
+
+
+class HistoryWriter:
+    """Write-behind queue that saves Reaction rows in batches from a background thread.
+
+    Requests only pay for a queue put; a daemon thread drains the queue and
+    bulk-inserts rows once batch_size is reached or flush_interval elapses.
+    The queue is bounded: when it is full, submit() waits up to
+    submit_timeout seconds and then rejects the row.
+    """
+
+    def __init__(self, app, db, batch_size=100, flush_interval=1.0, max_backlog=10000, submit_timeout=0.05):
+        self.app = app
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self._queue = queue.Queue(maxsize=max_backlog)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.submitted = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        atexit.register(self.stop)
+
+    def _ensure_thread(self):
+        # Started lazily so each forked gunicorn worker runs its own flusher
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, **values):
+        """Queue a Reaction row; returns False if the backlog is full"""
+        values.setdefault('created_at', datetime.utcnow())
+        if self._stopping.is_set():
+            self._write([values])
+            return True
+        self._ensure_thread()
+        try:
+            self._queue.put(values, timeout=self.submit_timeout)
+        except queue.Full:
+            self.rejected += 1
+            logging.warning("History write-behind queue is full; dropping reaction save")
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self):
+        while not self._stopping.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._write_queued(batch)
+
+    def _collect(self):
+        """Block for the first row, then gather more until the batch fills or the interval ends"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_queued(self, rows):
+        try:
+            self._write(rows)
+        finally:
+            for _ in rows:
+                self._queue.task_done()
+
+    def _write(self, rows):
+        from models import save_reactions
+        try:
+            with self.app.app_context(), STAGE_SECONDS.time(stage='db_save'):
+                save_reactions(rows, dedupe=self.app.config.get('HISTORY_DEDUPE', True))
+                self.db.session.commit()
+            self.written += len(rows)
+            logging.debug(f"Saved {len(rows)} reactions to database")
+        except Exception as e:
+            self.failed += len(rows)
+            logging.error(f"Error saving {len(rows)} reactions to database: {str(e)}")
+            with self.app.app_context():
+                self.db.session.rollback()
+
+    def flush(self):
+        """Write everything queued so far and wait for in-flight batches to land"""
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(rows) >= self.batch_size:
+                self._write_queued(rows)
+                rows = []
+        if rows:
+            self._write_queued(rows)
+        self._queue.join()
+
+    def stop(self, timeout=5.0):
+        """Stop the background thread after it drains the backlog"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        """Return queue depth and write counters"""
+        return {
+            'backlog': self._queue.qsize(),
+            'submitted': self.submitted,
+            'written': self.written,
+            'rejected': self.rejected,
+            'failed': self.failed
+        }
@@ -1,4 +1,5 @@
-from app import app
+from app import app, create_tables
 
 if __name__ == "__main__":
+    create_tables()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,183 @@
+"""In-process counters and histograms exposed in the Prometheus text format.
+
+Metrics live in the process that records them, so each server worker
+reports its own values on /metrics. Work done in a pool process can be
+wrapped with run_captured and its observations replayed in the parent,
+which is how offloaded predictions and parallel batches stay visible.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = {}
+_collectors = []
+_capture = threading.local()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _record(self, value, labels):
+        log = getattr(_capture, 'log', None)
+        if log is not None:
+            log.append((self.name, value, labels))
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(dict(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._record(amount, labels)
+
+    def values(self):
+        """Current count for each label tuple"""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self, labels, value):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+    def _replay(self, value, labels):
+        self.inc(value, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+        self._record(value, labels)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self, labels, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            bucket_labels = dict(labels, le=_format_value(float(bound)))
+            lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+    def _replay(self, value, labels):
+        self.observe(value, **labels)
+
+
+def register_collector(collector):
+    """Add a callable returning (name, type, help, [(labels, value), ...]) tuples at scrape time"""
+    _collectors.append(collector)
+
+
+def run_captured(fn, *args):
+    """Call fn(*args) and return (result, observations) for replay in another process"""
+    _capture.log = []
+    try:
+        return fn(*args), _capture.log
+    finally:
+        _capture.log = None
+
+
+def replay(observations):
+    """Record observations captured by run_captured in this process"""
+    for name, value, labels in observations:
+        metric = _metrics.get(name)
+        if metric is not None:
+            metric._replay(value, labels)
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in list(_metrics.values()):
+        lines.extend(metric.expose())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+STAGE_SECONDS = Histogram(
+    'chemreact_stage_seconds', 'Time spent in each stage of the prediction path', ['stage'])
+REQUEST_SECONDS = Histogram(
+    'chemreact_request_seconds', 'HTTP request latency', ['endpoint', 'method', 'status'])
+PREDICTIONS = Counter(
+    'chemreact_predictions_total', 'Predictions served by reaction type, catalyst and outcome',
+    ['reaction_type', 'catalyst', 'outcome'])
+ERRORS = Counter(
+    'chemreact_errors_total', 'Requests that failed, by endpoint and kind', ['endpoint', 'kind'])
+REJECTIONS = Counter(
+    'chemreact_rejections_total', 'Inputs and depictions turned away by the guardrails', ['reason'])
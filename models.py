@@ -1,4 +1,6 @@
+import hashlib
 from datetime import datetime
+from sqlalchemy import insert
 from app import db
 
 class Reaction(db.Model):
@@ -11,6 +13,21 @@ class Reaction(db.Model):
     product_smiles = db.Column(db.String(200))
     details = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Deduplicated storage: one row per (canonical reactant, catalyst, reaction type)
+    content_hash = db.Column(db.String(64), unique=True, index=True)
+    hit_count = db.Column(db.Integer, default=1)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Folded pattern fingerprints that screen substructure searches (see search.py)
+    reactant_fp = db.Column(db.BigInteger)
+    product_fp = db.Column(db.BigInteger)
+    
+    # Newest-first keyset pagination, optionally narrowed by one filter column
+    __table_args__ = (
+        db.Index('ix_reaction_created_at_id', 'created_at', 'id'),
+        db.Index('ix_reaction_reactant_created_at_id', 'reactant', 'created_at', 'id'),
+        db.Index('ix_reaction_catalyst_created_at_id', 'catalyst', 'created_at', 'id'),
+        db.Index('ix_reaction_reaction_type_created_at_id', 'reaction_type', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f'<Reaction {self.reactant} + {self.catalyst} ({self.reaction_type})>'
@@ -25,5 +42,135 @@ class Reaction(db.Model):
             'product': self.product,
             'product_smiles': self.product_smiles,
             'details': self.details,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'hit_count': self.hit_count or 1,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None
+        }
+
+def reaction_content_hash(reactant_smiles, catalyst, reaction_type):
+    """Hash the inputs that fully determine a prediction"""
+    key = '\x1f'.join([reactant_smiles or '', catalyst.lower(), reaction_type])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def stored_content_hash(reactant_smiles, catalyst, reaction_type, reactant=None):
+    """Content hash for a stored row, or None if neither its SMILES nor its reactant name resolves.
+
+    Older rows may have no reactant_smiles (free-form input used to be saved
+    without it) or a non-canonical one, so the structure is resolved again
+    the way the save path resolves it.
+    """
+    from chemistry_utils import resolve_compound
+    for compound in (reactant_smiles, reactant):
+        if compound:
+            _, canonical_smiles = resolve_compound(compound)
+            if canonical_smiles:
+                return reaction_content_hash(canonical_smiles, catalyst, reaction_type)
+    return None
+
+def backfill_content_hashes(session, batch_size=500):
+    """Hash rows saved before deduplication, folding repeats into one row; returns (hashed, merged).
+
+    Rows whose reactant doesn't resolve to a structure are left unhashed
+    rather than merged with anything.
+    """
+    hashed = merged = 0
+    last_id = 0
+    while True:
+        rows = Reaction.query.filter(Reaction.content_hash.is_(None), Reaction.id > last_id).order_by(
+            Reaction.id).limit(batch_size).all()
+        if not rows:
+            return hashed, merged
+        last_id = rows[-1].id
+        hashes = {row.id: stored_content_hash(row.reactant_smiles, row.catalyst, row.reaction_type, row.reactant)
+                  for row in rows}
+        hashes = {row_id: content_hash for row_id, content_hash in hashes.items() if content_hash}
+        keepers = {reaction.content_hash: reaction for reaction in
+                   Reaction.query.filter(Reaction.content_hash.in_(set(hashes.values())))}
+        for row in rows:
+            if row.id not in hashes:
+                continue
+            keeper = keepers.get(hashes[row.id])
+            if keeper is None:
+                row.content_hash = hashes[row.id]
+                row.hit_count = row.hit_count or 1
+                row.last_seen_at = row.last_seen_at or row.created_at
+                keepers[row.content_hash] = row
+                hashed += 1
+                continue
+            # Same rules as the upsert: counts add up and the time span widens
+            keeper.hit_count = (keeper.hit_count or 1) + (row.hit_count or 1)
+            keeper.created_at = min(keeper.created_at, row.created_at)
+            keeper.last_seen_at = max(keeper.last_seen_at or keeper.created_at, row.last_seen_at or row.created_at)
+            session.delete(row)
+            merged += 1
+        session.commit()
+
+def _merge_duplicates(rows):
+    """Collapse rows sharing a content hash into one row carrying the combined hit count"""
+    merged = {}
+    for row in rows:
+        existing = merged.get(row['content_hash'])
+        if existing is None:
+            merged[row['content_hash']] = dict(row, hit_count=1, last_seen_at=row['created_at'])
+        else:
+            existing.update({k: v for k, v in row.items() if k != 'created_at'})
+            existing['hit_count'] += 1
+            existing['created_at'] = min(existing['created_at'], row['created_at'])
+            existing['last_seen_at'] = max(existing['last_seen_at'], row['created_at'])
+    return list(merged.values())
+
+def save_reactions(rows, dedupe=True):
+    """Store reaction rows in the current session (the caller commits).
+
+    With dedupe, rows are upserted on content_hash: a repeat of a stored
+    reaction bumps its hit_count and last_seen_at instead of adding a row.
+    Every row must carry created_at and content_hash.
+    """
+    if not rows:
+        return
+    if not dedupe:
+        db.session.execute(insert(Reaction), [
+            dict(row, content_hash=None, last_seen_at=row['created_at']) for row in rows
+        ])
+        return
+
+    rows = _merge_duplicates(rows)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+            earliest, latest = db.func.least, db.func.greatest
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+            earliest, latest = db.func.min, db.func.max
+        stmt = upsert(Reaction).values(rows)
+        # Concurrent batches may land out of order, so keep the widest time span
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Reaction.content_hash],
+            set_={
+                'hit_count': db.func.coalesce(Reaction.hit_count, 1) + stmt.excluded.hit_count,
+                'created_at': earliest(Reaction.created_at, stmt.excluded.created_at),
+                'last_seen_at': latest(db.func.coalesce(Reaction.last_seen_at, Reaction.created_at),
+                                       stmt.excluded.last_seen_at),
+                'product': stmt.excluded.product,
+                'product_smiles': stmt.excluded.product_smiles,
+                'product_fp': stmt.excluded.product_fp,
+                'details': stmt.excluded.details
+            }
+        )
+        db.session.execute(stmt)
+        return
+
+    # Portable fallback for other databases
+    for row in rows:
+        reaction = Reaction.query.filter_by(content_hash=row['content_hash']).first()
+        if reaction is None:
+            db.session.add(Reaction(**row))
+        else:
+            reaction.hit_count = (reaction.hit_count or 1) + row['hit_count']
+            reaction.created_at = min(reaction.created_at, row['created_at'])
+            reaction.last_seen_at = max(reaction.last_seen_at or reaction.created_at, row['last_seen_at'])
+            reaction.product = row['product']
+            reaction.product_smiles = row['product_smiles']
+            reaction.product_fp = row.get('product_fp')
+            reaction.details = row['details']
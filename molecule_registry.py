@@ -0,0 +1,69 @@
+import threading
+
+from rdkit import Chem
+
+from caching import LRUCache
+
+
+class MoleculeRegistry:
+    """Interns parsed molecules so each distinct structure is parsed and canonicalized once.
+
+    Returned Mol objects are shared between callers and must be treated as
+    read-only; copy them (``Chem.Mol(mol)``) before adding conformers or
+    otherwise modifying them.
+    """
+
+    def __init__(self, max_entries=2048):
+        # Input text -> canonical SMILES ('' records a failed parse)
+        self._aliases = LRUCache(max_entries=max_entries * 4)
+        # Canonical SMILES -> interned Mol
+        self._mols = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.parses = 0
+        self.failures = 0
+
+    def get(self, smiles):
+        """Return (mol, canonical_smiles) for a SMILES string, or (None, None) if it doesn't parse"""
+        canonical = self._aliases.get(smiles)
+        if canonical == '':
+            return None, None
+        if canonical is not None:
+            mol = self._mols.get(canonical)
+            if mol is not None:
+                return mol, canonical
+
+        try:
+            mol = Chem.MolFromSmiles(smiles)
+        except Exception:
+            mol = None
+        with self._lock:
+            self.parses += 1
+            if mol is None:
+                self.failures += 1
+        if mol is None:
+            self._aliases.set(smiles, '')
+            return None, None
+
+        canonical = Chem.MolToSmiles(mol)
+        self._mols.set(canonical, mol)
+        self._aliases.set(smiles, canonical)
+        if canonical != smiles:
+            self._aliases.set(canonical, canonical)
+        return mol, canonical
+
+    def clear(self):
+        """Forget every interned molecule"""
+        self._aliases.clear()
+        self._mols.clear()
+        with self._lock:
+            self.parses = 0
+            self.failures = 0
+
+    def stats(self):
+        """Return parse counters and the occupancy of both interning tables"""
+        return {
+            'parses': self.parses,
+            'failures': self.failures,
+            'aliases': self._aliases.stats(),
+            'molecules': self._mols.stats()
+        }
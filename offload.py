@@ -0,0 +1,92 @@
+"""Bounded process pool for CPU-bound RDKit work on the request path.
+
+A slow depiction or prediction for a large free-form SMILES runs in a
+separate process, so the serving worker only waits up to a per-request
+timeout. A task that overruns keeps its slot until it actually finishes,
+which means a backlog of pathological molecules makes new requests fail
+fast with Overloaded instead of queueing behind them.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from metrics import replay, run_captured
+
+
+class Overloaded(Exception):
+    """Raised when every slot in the pool is already taken"""
+
+
+class WorkTimeout(Exception):
+    """Raised when a task doesn't finish within its time budget"""
+
+
+class BoundedProcessPool:
+    """ProcessPoolExecutor with a cap on outstanding tasks and per-call timeouts"""
+
+    def __init__(self, max_workers=None, max_pending=None, timeout=10.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self):
+        # Created on first use so each forked server worker owns its pool
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _release(self, future):
+        self.completed += 1
+        self._slots.release()
+
+    def run(self, fn, *args, timeout=None):
+        """Run fn(*args) in the pool and return its result.
+
+        Raises Overloaded if max_pending tasks are already outstanding and
+        WorkTimeout if the result isn't ready within timeout seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise Overloaded(f"{self.max_pending} tasks already pending")
+        try:
+            future = self._get_executor().submit(run_captured, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            result, observations = future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            logging.warning(f"{getattr(fn, '__name__', fn)} exceeded its {timeout or self.timeout}s budget")
+            raise WorkTimeout(f"Task exceeded {timeout or self.timeout}s")
+        # Metrics recorded in the pool process are reported by this one
+        replay(observations)
+        return result
+
+    def shutdown(self):
+        """Stop the worker processes without waiting for running tasks"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self):
+        """Return slot usage and outcome counters"""
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
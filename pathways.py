@@ -0,0 +1,105 @@
+"""Multi-step reaction pathways explored breadth-first from one reactant.
+
+Every intermediate is tried against every reaction type and catalyst with
+predict_reaction. Intermediates are deduplicated by canonical SMILES, and the
+one-step expansion of a molecule is memoized: it doesn't depend on how deep in
+the search the molecule was reached, so a structure met again (in this search
+or a later one) is never re-expanded. The search stops at the requested depth
+or once the graph holds the requested number of nodes.
+"""
+import os
+from collections import deque
+
+from caching import LRUCache
+from chemistry_utils import CATALYSTS, REACTION_TYPES, check_compound, normalize_compound, predict_reaction, resolve_compound
+
+DEFAULT_DEPTH = 3
+DEFAULT_MAX_NODES = 100
+MAX_DEPTH = int(os.environ.get('PATHWAY_MAX_DEPTH', 5))
+MAX_NODES = int(os.environ.get('PATHWAY_MAX_NODES', 500))
+
+# Canonical SMILES -> tuple of (reaction_type, catalysts, product_smiles, details)
+_EXPANSIONS = LRUCache(max_entries=int(os.environ.get('PATHWAY_CACHE_MAX_ENTRIES', 4096)))
+
+def expand(smiles):
+    """Return every single-step reaction of a canonical SMILES, grouping catalysts that give the same product"""
+    expansion = _EXPANSIONS.get(smiles)
+    if expansion is not None:
+        return expansion
+
+    steps = {}
+    for reaction_type in REACTION_TYPES:
+        for catalyst in CATALYSTS:
+            result = predict_reaction(smiles, catalyst, reaction_type)
+            if not result['success']:
+                continue
+            _, product = resolve_compound(result['product'])
+            if product is None or product == smiles:
+                continue
+            step = steps.get((reaction_type, product))
+            if step is None:
+                steps[(reaction_type, product)] = (result['details'], [catalyst])
+            else:
+                step[1].append(catalyst)
+
+    expansion = tuple(
+        (reaction_type, tuple(catalysts), product, details)
+        for (reaction_type, product), (details, catalysts) in steps.items()
+    )
+    _EXPANSIONS.set(smiles, expansion)
+    return expansion
+
+def explore(compound, depth=DEFAULT_DEPTH, max_nodes=DEFAULT_MAX_NODES):
+    """Breadth-first reaction graph from a compound name or SMILES, as a JSON-ready dict"""
+    compound = normalize_compound(compound)
+    error = check_compound(compound)
+    if error:
+        return {'success': False, 'error': error}
+    mol, root = resolve_compound(compound)
+    if mol is None:
+        return {'success': False, 'error': f"Couldn't recognize or parse the compound: {compound}"}
+
+    depth = max(0, min(depth, MAX_DEPTH))
+    max_nodes = max(1, min(max_nodes, MAX_NODES))
+    node_ids = {root: 0}
+    nodes = [{'id': 0, 'smiles': root, 'depth': 0}]
+    edges = []
+    truncated = False
+
+    queue = deque([root])
+    while queue:
+        smiles = queue.popleft()
+        source = node_ids[smiles]
+        level = nodes[source]['depth']
+        if level >= depth:
+            continue
+        for reaction_type, catalysts, product, details in expand(smiles):
+            target = node_ids.get(product)
+            if target is None:
+                if len(nodes) >= max_nodes:
+                    truncated = True
+                    continue
+                target = node_ids[product] = len(nodes)
+                nodes.append({'id': target, 'smiles': product, 'depth': level + 1})
+                queue.append(product)
+            edges.append({
+                'source': source,
+                'target': target,
+                'reaction_type': reaction_type,
+                'catalysts': list(catalysts),
+                'details': details
+            })
+
+    return {
+        'success': True,
+        'reactant': compound,
+        'depth': depth,
+        'max_nodes': max_nodes,
+        'truncated': truncated,
+        'nodes': nodes,
+        'edges': edges
+    }
+
+def get_pathway_cache_stats():
+    """Return hit/miss counters for the expansion cache"""
+    return _EXPANSIONS.stats()
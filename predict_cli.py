@@ -0,0 +1,195 @@
+"""Offline bulk prediction over large SMILES or CSV files.
+
+Records are streamed from disk, grouped into chunks and fanned out over a
+multiprocessing pool; results are written incrementally as NDJSON or CSV so
+memory use stays flat no matter how large the input is.
+
+Examples:
+    python predict_cli.py alcohols.smi --catalyst kmno4 --reaction-type oxidation
+    python predict_cli.py screen.csv -o results.ndjson --checkpoint screen.offset
+    python predict_cli.py screen.csv -o results.ndjson --start-offset 1048576
+
+A SMILES file has one compound per line (anything after the first whitespace
+is ignored). A CSV file needs a header with a ``compound`` column and may
+provide ``catalyst`` and ``reaction_type`` columns; missing values fall back
+to the command-line defaults. Quoted fields must not span lines.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from chemistry_utils import predict_reaction
+
+OUTPUT_FIELDS = ['offset', 'compound', 'catalyst', 'reaction_type', 'success', 'product', 'details', 'error']
+
+def detect_format(path):
+    """Guess the input format from the file extension"""
+    return 'csv' if path.lower().endswith(('.csv', '.tsv')) else 'smiles'
+
+def read_records(path, input_format, start_offset=0, catalyst='', reaction_type=''):
+    """Yield (offset, compound, catalyst, reaction_type) for each input row.
+
+    offset is the byte position just past the row, i.e. where a resumed run
+    should start once that row's result has been written.
+    """
+    with open(path, 'rb') as handle:
+        header = None
+        delimiter = '\t' if path.lower().endswith('.tsv') else ','
+        if input_format == 'csv':
+            header_line = handle.readline()
+            header = next(csv.reader([header_line.decode('utf-8')], delimiter=delimiter))
+            header = [column.strip().lower() for column in header]
+            if 'compound' not in header:
+                raise ValueError("CSV input needs a 'compound' column")
+            start_offset = max(start_offset, len(header_line))
+
+        offset = start_offset
+        if start_offset > 0:
+            # An offset that lands mid-line resumes from the next full row
+            handle.seek(start_offset - 1)
+            if handle.read(1) != b'\n':
+                offset += len(handle.readline())
+        else:
+            handle.seek(0)
+
+        for raw_line in handle:
+            offset += len(raw_line)
+            line = raw_line.decode('utf-8').strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if header is None:
+                yield offset, line.split()[0], catalyst, reaction_type
+                continue
+
+            row = dict(zip(header, next(csv.reader([line], delimiter=delimiter))))
+            compound = row.get('compound', '').strip()
+            if compound:
+                yield (offset, compound,
+                       row.get('catalyst', '').strip() or catalyst,
+                       row.get('reaction_type', '').strip() or reaction_type)
+
+def chunked(records, size):
+    """Group an iterator into lists of at most size items"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def predict_chunk(chunk):
+    """Pool entry point: predict every record in a chunk"""
+    results = []
+    for offset, compound, catalyst, reaction_type in chunk:
+        result = predict_reaction(compound, catalyst, reaction_type)
+        results.append({
+            'offset': offset,
+            'compound': compound,
+            'catalyst': catalyst,
+            'reaction_type': reaction_type,
+            'success': result['success'],
+            'product': result.get('product', ''),
+            'details': result.get('details', ''),
+            'error': result.get('error', '')
+        })
+    return results
+
+class NDJSONWriter:
+    """Write one JSON object per line"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+class CSVWriter:
+    """Write rows as CSV, emitting the header only for a fresh output"""
+
+    def __init__(self, stream, write_header=True):
+        self.writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS)
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+def run(args):
+    input_format = args.input_format or detect_format(args.input)
+    output_format = args.output_format or ('csv' if args.output and args.output.endswith('.csv') else 'ndjson')
+    resuming = args.start_offset > 0
+
+    if args.output:
+        output = open(args.output, 'a' if resuming else 'w', encoding='utf-8', newline='')
+    else:
+        output = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', line_buffering=False)
+
+    writer = NDJSONWriter(output) if output_format == 'ndjson' else CSVWriter(output, write_header=not resuming)
+    records = read_records(args.input, input_format, args.start_offset, args.catalyst, args.reaction_type)
+    chunks = chunked(records, args.chunk_size)
+
+    started = time.perf_counter()
+    last_report = started
+    rows = 0
+    next_offset = args.start_offset
+
+    pool = Pool(args.workers) if args.workers > 1 else None
+    try:
+        results = pool.imap(predict_chunk, chunks) if pool else map(predict_chunk, chunks)
+        for chunk_results in results:
+            for row in chunk_results:
+                writer.write(row)
+            output.flush()
+            rows += len(chunk_results)
+            next_offset = chunk_results[-1]['offset']
+
+            # Only record progress once the chunk is safely written
+            if args.checkpoint:
+                with open(args.checkpoint, 'w', encoding='utf-8') as handle:
+                    handle.write(f"{next_offset}\n")
+
+            now = time.perf_counter()
+            if now - last_report >= args.report_interval:
+                print(f"{rows} rows, {rows / (now - started):.1f} rows/s, next offset {next_offset}",
+                      file=sys.stderr)
+                last_report = now
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if args.output:
+            output.close()
+        else:
+            output.detach()
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"Done: {rows} rows in {elapsed:.2f}s ({rate:.1f} rows/s), next offset {next_offset}",
+          file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict alcohol/phenol reactions for every row of a file')
+    parser.add_argument('input', help='SMILES (.smi/.txt) or CSV (.csv/.tsv) file')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    parser.add_argument('--input-format', choices=['smiles', 'csv'], help='Override format detection')
+    parser.add_argument('--output-format', choices=['ndjson', 'csv'], help='Default: ndjson, or csv for .csv outputs')
+    parser.add_argument('--catalyst', default='', help='Catalyst for rows that do not specify one')
+    parser.add_argument('--reaction-type', default='', help='Reaction type for rows that do not specify one')
+    parser.add_argument('--start-offset', type=int, default=0, help='Resume from this byte offset, appending to the output')
+    parser.add_argument('--checkpoint', help='File updated with the resume offset after every chunk')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Rows per worker task (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: %(default)s)')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between progress reports')
+    args = parser.parse_args(argv)
+    return run(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Precomputed /predict responses for every dropdown combination.
+
+The UI only offers COMMON_ALCOHOLS x CATALYSTS x REACTION_TYPES, so every
+response for those inputs can be computed once and served from a dict.
+Free-form SMILES still go through the live RDKit path.
+
+Regenerate the table with ``python prediction_table.py build`` and verify it
+against the live path with ``python prediction_table.py check``. The file is
+stamped with the prediction code version (which covers the rules file), so a
+table written by other code or rules is ignored and rebuilt.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from chemistry_utils import COMMON_ALCOHOLS, CATALYSTS, REACTION_TYPES, build_prediction, normalize_compound
+from prediction_version import PREDICTION_CACHE_VERSION
+
+TABLE_PATH = os.environ.get(
+    'PREDICTION_TABLE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prediction_table.json')
+)
+
+_table = None
+_table_lock = threading.Lock()
+
+def table_key(compound, catalyst, reaction_type):
+    """Build the lookup key for a request triple, normalizing the compound like /predict does"""
+    return f"{normalize_compound(compound)}|{catalyst}|{reaction_type}"
+
+def build_table():
+    """Compute the response for every alcohol, catalyst and reaction type"""
+    table = {}
+    for compound in COMMON_ALCOHOLS:
+        for catalyst in CATALYSTS:
+            for reaction_type in REACTION_TYPES:
+                table[table_key(compound, catalyst, reaction_type)] = build_prediction(
+                    compound, catalyst, reaction_type)
+    return table
+
+def save_table(table, path=TABLE_PATH, version=None):
+    """Write the table to disk as JSON, stamped with the code version"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump({'version': version or PREDICTION_CACHE_VERSION, 'predictions': table}, handle,
+                  ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def load_table(path=TABLE_PATH, version=None):
+    """Read a table previously written by save_table, or None if it is missing or from another version"""
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            stored = json.load(handle)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.error(f"Error loading prediction table from {path}: {e}")
+        return None
+    if not isinstance(stored, dict) or 'predictions' not in stored:
+        logging.info(f"Ignoring unversioned prediction table at {path}")
+        return None
+    if version is not None and stored.get('version') != version:
+        logging.info(f"Ignoring prediction table at {path} built for version {stored.get('version')}, "
+                     f"expected {version}")
+        return None
+    return stored['predictions']
+
+def get_table():
+    """Return the shared table, loading it from disk or building it on first use"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                started = time.perf_counter()
+                table = load_table(version=PREDICTION_CACHE_VERSION)
+                source = TABLE_PATH
+                if table is None:
+                    table = build_table()
+                    source = 'live computation'
+                logging.info(f"Loaded {len(table)} precomputed predictions from {source} "
+                             f"in {time.perf_counter() - started:.2f}s")
+                _table = table
+    return _table
+
+def lookup(compound, catalyst, reaction_type):
+    """Return the precomputed response for a dropdown triple, or None for free-form input"""
+    if normalize_compound(compound) not in COMMON_ALCOHOLS:
+        return None
+    return get_table().get(table_key(compound, catalyst, reaction_type))
+
+def check_table(table):
+    """Return the keys whose stored response differs from the live path"""
+    mismatches = []
+    for compound in COMMON_ALCOHOLS:
+        for catalyst in CATALYSTS:
+            for reaction_type in REACTION_TYPES:
+                key = table_key(compound, catalyst, reaction_type)
+                if table.get(key) != build_prediction(compound, catalyst, reaction_type):
+                    mismatches.append(key)
+    return mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage the precomputed prediction table')
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--path', default=TABLE_PATH, help='Table location (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        table = build_table()
+        save_table(table, args.path)
+        print(f"Wrote {len(table)} predictions to {args.path} in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    table = load_table(args.path)
+    if table is None:
+        print(f"No prediction table at {args.path}; run 'build' first", file=sys.stderr)
+        return 1
+    mismatches = check_table(table)
+    for key in mismatches:
+        print(f"Mismatch: {key}")
+    print(f"{len(table) - len(mismatches)}/{len(table)} predictions match the live path")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
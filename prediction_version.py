@@ -0,0 +1,25 @@
+"""Version of the code and rules that determine a prediction.
+
+Cached /predict responses and the precomputed prediction table are stamped
+with it, so a deploy that changes the chemistry or the rules file never
+serves stale results. Importing this module is cheap: it reads a handful of
+files and loads neither RDKit nor the Flask app.
+"""
+import hashlib
+import os
+
+from reaction_rules import RULES_PATH
+
+# Every file whose contents can change a prediction
+SOURCES = ('chemistry_utils.py', 'reaction_templates.py', 'reaction_rules.py', 'pathways.py', 'descriptors.py')
+
+def code_version():
+    """Fingerprint the prediction code and the rules file"""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in SOURCES + (RULES_PATH,):
+        with open(os.path.join(here, path), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:12]
+
+PREDICTION_CACHE_VERSION = os.environ.get('PREDICTION_CACHE_VERSION') or code_version()
@@ -0,0 +1,116 @@
+"""Declarative reaction rules for alcohols and phenol.
+
+Each rule maps a reaction type, a set of substrate classes and a set of
+catalysts to one outcome: a fixed product, a SMARTS template from
+reaction_templates, or an error message. Rules are read once from
+reaction_rules.json (or REACTION_RULES_PATH; .yaml files need PyYAML) and
+indexed on (substrate_class, reaction_type, catalyst), so dispatching a
+prediction is a dict lookup. A rule whose catalysts are ``"*"`` applies to
+any catalyst not listed by a more specific rule.
+"""
+import json
+import os
+import string
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional; the bundled rules are JSON
+    yaml = None
+
+RULES_PATH = os.environ.get(
+    'REACTION_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reaction_rules.json')
+)
+
+ANY_CATALYST = '*'
+OUTCOMES = ('product', 'template', 'error')
+
+def _check_placeholders(text, allowed, where):
+    """Reject text that str.format would fail on at prediction time; literal braces must be doubled"""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(text) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"{where} has malformed braces: {e}") from None
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"{where} uses unknown placeholder '{{{unknown[0]}}}'; "
+                         f"allowed: {', '.join('{' + name + '}' for name in allowed)}")
+
+
+class ReactionRule:
+    """One outcome for a (substrate class, reaction type, catalyst) combination"""
+
+    __slots__ = ('reaction_type', 'product', 'template', 'variant', 'details', 'no_product', 'error')
+
+    def __init__(self, entry):
+        self.reaction_type = entry['reaction_type']
+        self.product = entry.get('product', '')
+        self.template = entry.get('template')
+        self.variant = entry.get('variant')
+        self.details = entry.get('details', '')
+        self.no_product = entry.get('no_product', '')
+        self.error = entry.get('error', '')
+
+
+class RuleRegistry:
+    """Rules indexed by (substrate_class, reaction_type, catalyst)"""
+
+    def __init__(self, data, templates=None):
+        self.substrate_classes = tuple(data['substrate_classes'])
+        self.unsupported = dict(data.get('unsupported', {}))
+        for substrate_class, message in self.unsupported.items():
+            _check_placeholders(message, ('reaction_type',), f"Unsupported message for '{substrate_class}'")
+        self._index = {}
+        for number, entry in enumerate(data['rules'], 1):
+            self._add(number, entry, templates)
+
+    def _add(self, number, entry, templates):
+        missing = [field for field in ('reaction_type', 'substrates', 'catalysts') if field not in entry]
+        if missing:
+            raise ValueError(f"Rule {number} is missing {', '.join(missing)}")
+        outcomes = [field for field in OUTCOMES if field in entry]
+        if len(outcomes) != 1:
+            raise ValueError(f"Rule {number} needs exactly one of {', '.join(OUTCOMES)}")
+
+        _check_placeholders(entry.get('details', ''), ('catalyst',), f"Rule {number} details")
+        rule = ReactionRule(entry)
+        catalysts = entry['catalysts']
+        catalysts = [ANY_CATALYST] if catalysts == ANY_CATALYST else [c.lower() for c in catalysts]
+        for substrate_class in entry['substrates']:
+            if substrate_class not in self.substrate_classes:
+                raise ValueError(f"Rule {number} uses unknown substrate class '{substrate_class}'")
+            if rule.template and templates is not None and \
+                    (rule.template, substrate_class, rule.variant) not in templates:
+                raise ValueError(f"Rule {number} has no {rule.template} template for {substrate_class}")
+            for catalyst in catalysts:
+                key = (substrate_class, rule.reaction_type, catalyst)
+                if key in self._index:
+                    raise ValueError(f"Rule {number} duplicates {key}")
+                self._index[key] = rule
+
+    def lookup(self, substrate_class, reaction_type, catalyst):
+        """Return the rule for a combination, or None if the reaction type isn't covered"""
+        rule = self._index.get((substrate_class, reaction_type, catalyst.lower()))
+        if rule is None:
+            rule = self._index.get((substrate_class, reaction_type, ANY_CATALYST))
+        return rule
+
+    def unsupported_message(self, substrate_class, reaction_type):
+        """Error for a reaction type no rule covers for this substrate class"""
+        message = self.unsupported.get(substrate_class, self.unsupported.get('default', ''))
+        return message.format(reaction_type=reaction_type)
+
+    def __len__(self):
+        return len(self._index)
+
+
+def load_rules(path=RULES_PATH, templates=None):
+    """Read and validate a rules file; templates, if given, is checked for every template rule"""
+    with open(path, encoding='utf-8') as handle:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ValueError(f"PyYAML is required to read {path}")
+            data = yaml.safe_load(handle)
+        else:
+            data = json.load(handle)
+    return RuleRegistry(data, templates)
@@ -0,0 +1,96 @@
+"""Substructure classification and SMARTS reaction templates for alcohols.
+
+Every query and reaction is compiled once at import, so classifying a
+molecule and applying a transformation costs a handful of substructure
+matches regardless of how the input SMILES was written.
+"""
+from rdkit import Chem
+from rdkit.Chem import rdChemReactions
+
+# Hydroxyl-bearing carbon for each substrate class, in the order classes are tried.
+# Methanol comes first because its CH3 carbon would otherwise read as "primary".
+SUBSTRATE_CARBONS = {
+    'methanol': '[CH3]',
+    'primary': '[CX4H2]',
+    'secondary': '[CX4H1]',
+    'tertiary': '[CX4H0]',
+    'phenol': 'c'
+}
+
+SUBSTRATE_QUERIES = {
+    substrate_class: Chem.MolFromSmarts(f'{carbon}[OX2H]')
+    for substrate_class, carbon in SUBSTRATE_CARBONS.items()
+}
+
+HYDROXYL_QUERY = Chem.MolFromSmarts('[#6][OX2H]')
+PHENOL_QUERY = Chem.MolFromSmarts('[OX2H]c1ccccc1')
+
+HALOGENS = ('Cl', 'Br', 'I')
+
+def _carbon(substrate_class):
+    return SUBSTRATE_CARBONS[substrate_class][1:-1]
+
+def _template_smarts():
+    """Reaction SMARTS keyed by (reaction, substrate_class, variant)"""
+    templates = {
+        ('oxidation', 'primary', None): '[CX4H2:1][OX2H:2]>>[#6:1](=O)[O:2]',
+        ('oxidation', 'secondary', None): '[CX4H1:1][OX2H:2]>>[#6:1]=[O:2]',
+        ('esterification', 'phenol', None): '[c:1][OX2H:2]>>[#6:1][O:2]C(C)=O'
+    }
+    for substrate_class in ('primary', 'secondary', 'tertiary'):
+        carbon = _carbon(substrate_class)
+        templates[('dehydration', substrate_class, None)] = f'[CX4;!H0:3][{carbon}:1][OX2H]>>[#6:3]=[#6:1]'
+    for substrate_class in ('methanol', 'primary', 'secondary', 'tertiary'):
+        carbon = _carbon(substrate_class)
+        templates[('esterification', substrate_class, None)] = f'[{carbon}:1][OX2H:2]>>[#6:1][O:2]C(C)=O'
+        for halogen in HALOGENS:
+            templates[('halogenation', substrate_class, halogen)] = f'[{carbon}:1][OX2H]>>[#6:1]{halogen}'
+    return templates
+
+TEMPLATE_SMARTS = _template_smarts()
+
+TEMPLATES = {key: rdChemReactions.ReactionFromSmarts(smarts) for key, smarts in TEMPLATE_SMARTS.items()}
+for _reaction in TEMPLATES.values():
+    _reaction.Initialize()
+
+def is_alcohol(mol):
+    """True if the molecule carries at least one carbon-bound hydroxyl group"""
+    return mol.HasSubstructMatch(HYDROXYL_QUERY)
+
+def is_phenol(mol):
+    """True only for phenol itself, not substituted phenols"""
+    return mol.GetNumHeavyAtoms() == 7 and mol.HasSubstructMatch(PHENOL_QUERY)
+
+def classify_alcohol(mol):
+    """Return the substrate class of the most reactive hydroxyl, or None"""
+    for substrate_class, query in SUBSTRATE_QUERIES.items():
+        if mol.HasSubstructMatch(query):
+            return substrate_class
+    return None
+
+def _substitution(product):
+    """Heavy-atom degree of the atoms the template touched (Zaitsev ranking for alkenes)"""
+    return sum(atom.GetDegree() for atom in product.GetAtoms() if atom.HasProp('old_mapno'))
+
+def apply_template(reaction, substrate_class, mol, variant=None):
+    """Apply a compiled template and return the canonical product SMILES, or ''.
+
+    When several hydroxyl sites match, the most substituted product wins and
+    ties are broken by canonical SMILES so results are deterministic.
+    """
+    template = TEMPLATES.get((reaction, substrate_class, variant))
+    if template is None:
+        return ''
+
+    candidates = []
+    for products in template.RunReactants((mol,)):
+        product = products[0]
+        try:
+            Chem.SanitizeMol(product)
+        except (ValueError, RuntimeError):
+            continue
+        candidates.append((-_substitution(product), Chem.MolToSmiles(product)))
+
+    if not candidates:
+        return ''
+    return min(candidates)[1]
@@ -0,0 +1,54 @@
+import json
+import secrets
+import time
+
+from caching import LRUCache
+
+
+class ResultTokenStore:
+    """Short-lived server-side references to computed predictions.
+
+    /predict issues a token for each successful result so a later save only
+    has to look the row up instead of recomputing it. Entries live in a
+    per-worker LRU and are written through to a shared store (a FileStore
+    or SQLiteStore) so any worker can redeem the token.
+    """
+
+    # Expired tokens are swept from the shared store every this many issues
+    PRUNE_EVERY = 1000
+
+    def __init__(self, ttl=900, max_entries=10000, store=None):
+        self.ttl = ttl
+        self._store = store
+        self._cache = LRUCache(max_entries=max_entries, store=store)
+        self._issued = 0
+        if store is not None:
+            store.prune(ttl)
+
+    def issue(self, values):
+        """Store values and return the token that refers to them"""
+        token = secrets.token_urlsafe(16)
+        self._cache.set(token, json.dumps({
+            'expires_at': time.time() + self.ttl,
+            'values': values
+        }))
+        self._issued += 1
+        if self._store is not None and self._issued % self.PRUNE_EVERY == 0:
+            self._store.prune(self.ttl)
+        return token
+
+    def resolve(self, token):
+        """Return the values stored under token, or None if unknown or expired"""
+        if not token:
+            return None
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        entry = json.loads(entry)
+        if entry['expires_at'] < time.time():
+            return None
+        return entry['values']
+
+    def stats(self):
+        """Return cache counters for issued tokens"""
+        return self._cache.stats()
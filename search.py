@@ -0,0 +1,166 @@
+"""Full-text and substructure search over saved reactions.
+
+Text search uses a GIN expression index with ``to_tsvector`` on PostgreSQL
+and an FTS5 table kept in sync by triggers on SQLite; other databases fall
+back to LIKE. Both are set up by ``flask create-tables``.
+
+Substructure search screens on a 64-bit folded RDKit pattern fingerprint
+stored next to each SMILES: a row can only contain the query if every bit
+of the query fingerprint is set in its own, which the database checks with
+one bitwise AND. Only the survivors are parsed and verified with RDKit.
+"""
+import logging
+
+FINGERPRINT_BITS = 64
+SEARCH_COLUMNS = ('reactant', 'catalyst', 'reaction_type', 'product', 'details')
+# Searchable side -> (SMILES column, fingerprint column)
+SUBSTRUCTURE_SIDES = {
+    'reactant': ('reactant_smiles', 'reactant_fp'),
+    'product': ('product_smiles', 'product_fp')
+}
+
+# The expression must match the index definition exactly for PostgreSQL to use it
+_PG_DOCUMENT = "to_tsvector('english', " + " || ' ' || ".join(
+    f"coalesce({column}, '')" for column in SEARCH_COLUMNS) + ")"
+
+# Engine URL -> 'postgresql', 'fts5' or 'like'
+_text_backends = {}
+
+def _to_signed(bits):
+    """Fit an unsigned 64-bit mask into a signed BIGINT column"""
+    return bits - (1 << 64) if bits >= 1 << 63 else bits
+
+def _fingerprint_mol(mol):
+    from rdkit import Chem
+    fp = Chem.PatternFingerprint(mol, fpSize=FINGERPRINT_BITS)
+    return _to_signed(sum(1 << bit for bit in fp.GetOnBits()))
+
+def fingerprint(smiles):
+    """Screening fingerprint for a stored SMILES; 0 if it doesn't parse, so it never passes a screen"""
+    from chemistry_utils import MOLECULE_REGISTRY
+    mol, _ = MOLECULE_REGISTRY.get(smiles) if smiles else (None, None)
+    return _fingerprint_mol(mol) if mol is not None else 0
+
+def reaction_fingerprints(values):
+    """Fingerprint columns for a Reaction row"""
+    return {fp_column: fingerprint(values.get(smiles_column))
+            for smiles_column, fp_column in SUBSTRUCTURE_SIDES.values()}
+
+def parse_query(smarts):
+    """Compile a SMARTS (or SMILES) substructure query; returns (mol, error)"""
+    from rdkit import Chem
+    from guardrails import admission_error
+    error = admission_error(smarts)
+    if error:
+        return None, error
+    mol = Chem.MolFromSmarts(smarts)
+    if mol is None:
+        return None, f"Couldn't parse the substructure query: {smarts}"
+    return mol, None
+
+def substructure_filter(model, query_mol, sides):
+    """SQL screen: rows whose fingerprint on any of the sides covers the query's bits"""
+    from app import db
+    mask = _fingerprint_mol(query_mol)
+    clauses = []
+    for side in sides:
+        column = getattr(model, SUBSTRUCTURE_SIDES[side][1])
+        # Rows saved before the column existed are unscreened until backfilled
+        clauses.append(db.or_(column.is_(None), column.op('&')(mask) == mask))
+    return db.or_(*clauses)
+
+def matches(query_mol, row, sides):
+    """RDKit verification of a screened row"""
+    from chemistry_utils import MOLECULE_REGISTRY
+    for side in sides:
+        smiles = getattr(row, SUBSTRUCTURE_SIDES[side][0])
+        mol, _ = MOLECULE_REGISTRY.get(smiles) if smiles else (None, None)
+        if mol is not None and mol.HasSubstructMatch(query_mol):
+            return True
+    return False
+
+def text_backend(engine):
+    """Which full-text implementation the database behind engine supports"""
+    backend = _text_backends.get(str(engine.url))
+    if backend is None:
+        if engine.dialect.name == 'postgresql':
+            backend = 'postgresql'
+        elif engine.dialect.name == 'sqlite':
+            from app import db
+            with engine.connect() as connection:
+                found = connection.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reaction_fts'")).first()
+            backend = 'fts5' if found else 'like'
+        else:
+            backend = 'like'
+        _text_backends[str(engine.url)] = backend
+    return backend
+
+def _fts5_query(text):
+    """Quote each word as an FTS5 prefix term so user input can't break the query syntax"""
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+def text_filter(model, engine, text):
+    """SQL condition matching rows whose names or details contain every word of text"""
+    from app import db
+    backend = text_backend(engine)
+    if backend == 'postgresql':
+        return db.text(f"{_PG_DOCUMENT} @@ websearch_to_tsquery('english', :search_text)").bindparams(
+            search_text=text)
+    if backend == 'fts5':
+        return model.id.in_(
+            db.select(db.literal_column('rowid')).select_from(db.table('reaction_fts')).where(
+                db.text('reaction_fts MATCH :search_text').bindparams(search_text=_fts5_query(text))))
+    columns = [getattr(model, column) for column in SEARCH_COLUMNS]
+    return db.and_(*[
+        db.or_(*[column.ilike(f'%{word}%') for column in columns])
+        for word in text.split()
+    ])
+
+def _sqlite_fts_ddl(table):
+    columns = ', '.join(SEARCH_COLUMNS)
+    new = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS reaction_fts USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS reaction_fts_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO reaction_fts(rowid, {columns}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS reaction_fts_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO reaction_fts(reaction_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS reaction_fts_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO reaction_fts(reaction_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO reaction_fts(rowid, {columns}) VALUES (new.id, {new}); END",
+        "INSERT INTO reaction_fts(reaction_fts) VALUES ('rebuild')"
+    ]
+
+def create_search_index(engine, table):
+    """Create the full-text index for the dialect; failures leave search on the LIKE fallback"""
+    from app import db
+    if engine.dialect.name == 'postgresql':
+        statements = [f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin ({_PG_DOCUMENT})"]
+    elif engine.dialect.name == 'sqlite':
+        statements = _sqlite_fts_ddl(table)
+    else:
+        return
+    try:
+        with engine.begin() as connection:
+            for statement in statements:
+                connection.execute(db.text(statement))
+    except Exception as e:
+        logging.error(f"Error creating full-text index, falling back to LIKE search: {e}")
+    _text_backends.pop(str(engine.url), None)
+
+def backfill_fingerprints(model, session, batch_size=500):
+    """Fill in fingerprints for rows saved before the columns existed; returns the number updated"""
+    updated = 0
+    while True:
+        rows = session.query(model.id, model.reactant_smiles, model.product_smiles).filter(
+            (model.reactant_fp.is_(None)) | (model.product_fp.is_(None))).limit(batch_size).all()
+        if not rows:
+            return updated
+        session.bulk_update_mappings(model, [
+            dict(id=row.id, **reaction_fingerprints(row._mapping)) for row in rows
+        ])
+        session.commit()
+        updated += len(rows)
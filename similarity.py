@@ -0,0 +1,260 @@
+"""Nearest-neighbour lookup over known alcohols and saved reaction products.
+
+Morgan fingerprints are kept as packed bit rows in an append-only file that
+every worker memory-maps, with one JSON line of metadata per row beside it.
+Tanimoto similarity against the whole index is a handful of vectorized NumPy
+operations on 64-bit words. Saving a reaction appends its product if it isn't
+indexed yet; appends take a file lock, and workers pick up rows added by
+others the next time they search.
+
+The index is seeded with COMMON_ALCOHOLS and every stored product on first
+use; ``python similarity.py build`` rebuilds it from the database.
+"""
+import argparse
+import fcntl
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+RADIUS = 2
+FP_BITS = int(os.environ.get('SIMILARITY_FP_BITS', 2048))
+FP_BYTES = FP_BITS // 8
+FP_WORDS = FP_BITS // 64
+INDEX_DIR = os.environ.get('SIMILARITY_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'chemreact_similarity'))
+DEFAULT_K = 5
+MAX_K = 50
+
+if FP_BITS % 64:
+    raise ValueError('SIMILARITY_FP_BITS must be a multiple of 64')
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+else:  # NumPy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return _BYTE_COUNTS[words.view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+_generator = None
+
+def fingerprint(mol):
+    """Morgan fingerprint of a molecule as FP_WORDS 64-bit words"""
+    global _generator
+    if _generator is None:
+        from rdkit.Chem import rdFingerprintGenerator
+        _generator = rdFingerprintGenerator.GetMorganGenerator(radius=RADIUS, fpSize=FP_BITS)
+    return np.packbits(_generator.GetFingerprintAsNumPy(mol).astype(bool)).view(np.uint64)
+
+
+class SimilarityIndex:
+    """Append-only fingerprint file plus metadata, shared by every worker on a host"""
+
+    def __init__(self, directory=INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f'morgan{RADIUS}_{FP_BITS}')
+        self.fingerprints_path = base + '.bin'
+        self.entries_path = base + '.jsonl'
+        self._lock_path = base + '.lock'
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._fingerprints = np.zeros((0, FP_WORDS), dtype=np.uint64)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._sources = np.zeros(0, dtype='U8')
+        self._entries_offset = 0
+        self.entries = []
+        self._smiles = set()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, smiles):
+        return smiles in self._smiles
+
+    @contextmanager
+    def _file_lock(self, mode):
+        with open(self._lock_path, 'a') as handle:
+            fcntl.flock(handle, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load_new_rows(self):
+        """Map rows appended since the last load, by this or any other process"""
+        try:
+            rows = os.path.getsize(self.fingerprints_path) // FP_BYTES
+        except FileNotFoundError:
+            rows = 0
+        if rows < len(self.entries):
+            # The files were rebuilt underneath us
+            self._reset()
+        if rows == len(self.entries):
+            return
+        with open(self.entries_path, 'r', encoding='utf-8') as handle:
+            handle.seek(self._entries_offset)
+            new_entries = [json.loads(handle.readline()) for _ in range(rows - len(self.entries))]
+            self._entries_offset = handle.tell()
+        mapped = np.memmap(self.fingerprints_path, dtype=np.uint64, mode='r', shape=(rows, FP_WORDS))
+        self._counts = np.concatenate([self._counts, _popcount(mapped[len(self.entries):])])
+        self._sources = np.concatenate([self._sources, [entry['source'] for entry in new_entries]])
+        self._fingerprints = mapped
+        self.entries.extend(new_entries)
+        self._smiles.update(entry['smiles'] for entry in new_entries)
+
+    def refresh(self):
+        """Pick up rows other workers appended"""
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._load_new_rows()
+
+    def add(self, items):
+        """Append (mol, entry) pairs whose entry['smiles'] isn't indexed yet; returns how many were added"""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._load_new_rows()
+            fingerprints = []
+            entries = []
+            batch = set()
+            for mol, entry in items:
+                if mol is None or entry['smiles'] in self._smiles or entry['smiles'] in batch:
+                    continue
+                batch.add(entry['smiles'])
+                fingerprints.append(fingerprint(mol))
+                entries.append(entry)
+            if not entries:
+                return 0
+            # Drop anything an interrupted append left past the last complete row
+            for path, size in ((self.entries_path, self._entries_offset),
+                               (self.fingerprints_path, len(self.entries) * FP_BYTES)):
+                if os.path.exists(path) and os.path.getsize(path) > size:
+                    os.truncate(path, size)
+            # Metadata first: readers size the index by the fingerprint file
+            with open(self.entries_path, 'a', encoding='utf-8') as handle:
+                handle.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+            with open(self.fingerprints_path, 'ab') as handle:
+                handle.write(np.vstack(fingerprints).tobytes())
+            self._load_new_rows()
+            return len(entries)
+
+    def search(self, mol, k=DEFAULT_K, source=None):
+        """Top-k entries by Tanimoto similarity to mol, optionally limited to one source"""
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._load_new_rows()
+            fingerprints, counts, sources, entries = self._fingerprints, self._counts, self._sources, self.entries
+        if not len(counts):
+            return []
+        query = fingerprint(mol)
+        common = _popcount(fingerprints & query)
+        union = counts + int(_popcount(query)) - common
+        scores = np.where(union > 0, common / np.maximum(union, 1), 0.0)
+        if source is not None:
+            scores = np.where(sources == source, scores, -1.0)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [dict(entries[i], similarity=round(float(scores[i]), 4)) for i in top if scores[i] >= 0]
+
+    def clear(self):
+        """Delete the index files"""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            for path in (self.fingerprints_path, self.entries_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._reset()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def _alcohol_items():
+    from chemistry_utils import COMMON_ALCOHOLS, resolve_compound
+    for name, smiles in COMMON_ALCOHOLS.items():
+        mol, canonical = resolve_compound(smiles)
+        yield mol, {'smiles': canonical, 'source': 'alcohol', 'name': name}
+
+def _product_item(reactant, catalyst, reaction_type, product_smiles):
+    from chemistry_utils import MOLECULE_REGISTRY
+    mol, canonical = MOLECULE_REGISTRY.get(product_smiles) if product_smiles else (None, None)
+    return mol, {'smiles': canonical, 'source': 'reaction', 'reactant': reactant,
+                 'catalyst': catalyst, 'reaction_type': reaction_type}
+
+def _stored_product_items():
+    """Every saved product; needs an application context"""
+    from models import Reaction
+    query = Reaction.query.with_entities(
+        Reaction.reactant, Reaction.catalyst, Reaction.reaction_type, Reaction.product_smiles
+    ).filter(Reaction.product_smiles.isnot(None)).order_by(Reaction.id)
+    for row in query.yield_per(1000):
+        yield _product_item(*row)
+
+def build(index):
+    """Seed an index with the common alcohols and every stored product"""
+    added = index.add(_alcohol_items())
+    try:
+        added += index.add(_stored_product_items())
+    except Exception as e:
+        logging.error(f"Error indexing stored products: {e}")
+    return added
+
+def get_index():
+    """The process-wide index, seeded on first use if the files are empty"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SimilarityIndex()
+                index.refresh()
+                if not len(index):
+                    build(index)
+                _index = index
+    return _index
+
+def add_reaction(values):
+    """Index the product of a saved reaction"""
+    index = get_index()
+    if not values.get('product_smiles') or values['product_smiles'] in index:
+        return
+    index.add([_product_item(values['reactant'], values['catalyst'], values['reaction_type'],
+                             values['product_smiles'])])
+
+def find_similar(compound, k=DEFAULT_K, source=None):
+    """Nearest indexed structures to a compound name or SMILES"""
+    from chemistry_utils import check_compound, normalize_compound, resolve_compound
+    compound = normalize_compound(compound)
+    error = check_compound(compound)
+    if error:
+        return {'success': False, 'error': error}
+    mol, canonical = resolve_compound(compound)
+    if mol is None:
+        return {'success': False, 'error': f"Couldn't recognize or parse the compound: {compound}"}
+    return {
+        'success': True,
+        'query': canonical,
+        'results': get_index().search(mol, max(1, min(k, MAX_K)), source)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=['build'])
+    parser.parse_args(argv)
+
+    from app import app
+    index = SimilarityIndex()
+    index.clear()
+    with app.app_context():
+        added = build(index)
+    print(f"Indexed {added} structures in {index.fingerprints_path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Startup timing and worker warm-up.
+
+app.py records how long its imports and setup take; warm_up() then loads
+RDKit, the precomputed prediction table and the common-alcohol depictions
+so the first requests a fresh worker serves don't pay for them. The level
+comes from WARMUP: ``off``, ``parse`` (imports, parsing and the prediction
+table) or ``full`` (also pre-renders depictions; the default).
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from metrics import register_collector
+
+WARMUP = os.environ.get('WARMUP', 'full').lower()
+
+# Phase name -> seconds, in the order the phases ran
+PHASES = {}
+
+def record_phase(name, seconds):
+    """Add seconds to a named startup phase"""
+    PHASES[name] = PHASES.get(name, 0.0) + seconds
+
+@contextmanager
+def phase(name):
+    """Record the duration of the with block as a startup phase"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+def warm_up(level=WARMUP):
+    """Load and exercise the chemistry stack before the worker takes traffic"""
+    if level not in ('parse', 'full'):
+        return
+    with phase('import_chemistry'):
+        import chemistry_utils
+        import prediction_table
+    with phase('warmup_parse'):
+        for name in chemistry_utils.COMMON_ALCOHOLS:
+            chemistry_utils.resolve_compound(name)
+        prediction_table.get_table()
+    if level == 'full':
+        with phase('warmup_render'):
+            from depictions import get_depiction, register_depiction
+            for name in chemistry_utils.COMMON_ALCOHOLS:
+                key = register_depiction(name)
+                if key:
+                    get_depiction(key)
+
+def report():
+    """Log the startup phases in one line"""
+    phases = ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in PHASES.items())
+    logging.info(f"Worker {os.getpid()} ready in {sum(PHASES.values()) * 1000:.0f} ms ({phases})")
+
+def collect_startup_metrics():
+    yield ('chemreact_startup_seconds', 'gauge', 'Time spent in each startup phase of this worker',
+           [({'phase': name}, seconds) for name, seconds in PHASES.items()])
+
+register_collector(collect_startup_metrics)
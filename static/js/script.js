@@ -15,6 +15,76 @@ document.addEventListener('DOMContentLoaded', function() {
     // Current reaction data
     let currentReactionData = null;
     
+    // Predictions already fetched, keyed on the form triple. Entries expire well
+    // before the server forgets their result token, so a cached result can still be saved.
+    const RESULT_CACHE_SIZE = 50;
+    const RESULT_CACHE_TTL = 10 * 60 * 1000;
+    const resultCache = new Map();
+    // Requests still in flight, so a repeat submit joins the pending one
+    const pendingPredictions = new Map();
+    // Result tokens already saved, so a second click doesn't save twice
+    const savedTokens = new Set();
+    // Submits of the same triple closer together than this are ignored
+    const SUBMIT_DEBOUNCE_MS = 500;
+    let lastSubmit = {key: null, time: 0};
+    
+    function predictionKey(formData) {
+        // Names are case-insensitive on the server; SMILES are not
+        let compound = (formData.get('compound') || '').trim();
+        if (commonAlcohols.includes(compound.toLowerCase())) {
+            compound = compound.toLowerCase();
+        }
+        return [compound, formData.get('catalyst') || '', formData.get('reaction_type') || ''].join('|');
+    }
+    
+    function cachedPrediction(key) {
+        const entry = resultCache.get(key);
+        if (!entry) {
+            return null;
+        }
+        if (Date.now() - entry.time > RESULT_CACHE_TTL) {
+            resultCache.delete(key);
+            return null;
+        }
+        // Re-insert so the Map's insertion order tracks recency
+        resultCache.delete(key);
+        resultCache.set(key, entry);
+        return entry.data;
+    }
+    
+    function cachePrediction(key, data) {
+        resultCache.set(key, {data: data, time: Date.now()});
+        if (resultCache.size > RESULT_CACHE_SIZE) {
+            resultCache.delete(resultCache.keys().next().value);
+        }
+    }
+    
+    function fetchPrediction(key, formData) {
+        const cached = cachedPrediction(key);
+        if (cached) {
+            return Promise.resolve(cached);
+        }
+        if (pendingPredictions.has(key)) {
+            return pendingPredictions.get(key);
+        }
+        
+        const request = fetch('/predict', {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => response.json().then(data => {
+            // Overload and timeout responses are worth retrying, so they aren't cached
+            if (response.ok) {
+                cachePrediction(key, data);
+            }
+            return data;
+        }))
+        .finally(() => pendingPredictions.delete(key));
+        
+        pendingPredictions.set(key, request);
+        return request;
+    }
+    
     // Common alcohols for the dropdown
     const commonAlcohols = [
         'methanol',
@@ -155,25 +225,31 @@ document.addEventListener('DOMContentLoaded', function() {
             saveSuccess.classList.add('d-none');
             saveError.classList.add('d-none');
             
-            // Prepare form data
+            const token = currentReactionData.result_token;
+            if (savedTokens.has(token)) {
+                showSaveSuccess();
+                return;
+            }
+            
+            // Save by reference to the result the server already computed; the
+            // inputs let it recompute if the token can't be redeemed
             const formData = new FormData();
+            formData.append('result_token', token);
             formData.append('compound', currentReactionData.reactant);
             formData.append('catalyst', currentReactionData.catalyst);
             formData.append('reaction_type', currentReactionData.reaction_type);
-            formData.append('save_to_db', 'true');
             
-            // Send save request
-            fetch('/predict', {
+            // Send save request; the button stays disabled until it completes
+            saveButton.disabled = true;
+            fetch('/history/save', {
                 method: 'POST',
                 body: formData
             })
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    saveSuccess.classList.remove('d-none');
-                    setTimeout(() => {
-                        saveSuccess.classList.add('d-none');
-                    }, 3000);
+                    savedTokens.add(token);
+                    showSaveSuccess();
                 } else {
                     saveError.classList.remove('d-none');
                     saveErrorText.textContent = data.error || 'Failed to save reaction.';
@@ -183,10 +259,33 @@ document.addEventListener('DOMContentLoaded', function() {
                 saveError.classList.remove('d-none');
                 saveErrorText.textContent = 'Network error: ' + error.message;
                 console.error('Error saving reaction:', error);
+            })
+            .finally(() => {
+                saveButton.disabled = false;
             });
         });
     }
     
+    function showSaveSuccess() {
+        saveSuccess.classList.remove('d-none');
+        setTimeout(() => {
+            saveSuccess.classList.add('d-none');
+        }, 3000);
+    }
+    
+    // Structures are cacheable SVG assets rather than inline documents
+    function structureImage(url, label) {
+        if (!url) {
+            // Large structures are returned as SMILES only
+            return '<div class="text-muted">No depiction available; see SMILES below</div>';
+        }
+        const img = document.createElement('img');
+        img.src = url;
+        img.alt = label || 'Molecular structure';
+        img.className = 'img-fluid';
+        return img.outerHTML;
+    }
+    
     // Form submission
     form.addEventListener('submit', function(e) {
         e.preventDefault();
@@ -194,6 +293,14 @@ document.addEventListener('DOMContentLoaded', function() {
         // Get form data
         const formData = new FormData(form);
         
+        // Ignore a double submit of the same combination
+        const key = predictionKey(formData);
+        const now = Date.now();
+        if (key === lastSubmit.key && now - lastSubmit.time < SUBMIT_DEBOUNCE_MS) {
+            return;
+        }
+        lastSubmit = {key: key, time: now};
+        
         // Show loading, hide results and errors
         loadingIndicator.classList.remove('d-none');
         errorMessage.classList.add('d-none');
@@ -204,13 +311,14 @@ document.addEventListener('DOMContentLoaded', function() {
         if (saveSuccess) saveSuccess.classList.add('d-none');
         if (saveError) saveError.classList.add('d-none');
         
-        // Send the request
-        fetch('/predict', {
-            method: 'POST',
-            body: formData
-        })
-        .then(response => response.json())
+        // Send the request, unless this combination is cached or already on its way
+        fetchPrediction(key, formData)
         .then(data => {
+            // A newer submit owns the result panel
+            if (key !== lastSubmit.key) {
+                return;
+            }
+            
             // Hide loading
             loadingIndicator.classList.add('d-none');
             
@@ -222,12 +330,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 resultsContainer.classList.remove('d-none');
                 
                 // Update reactant information
-                document.getElementById('reactant-structure').innerHTML = data.reactant_svg;
+                document.getElementById('reactant-structure').innerHTML = structureImage(data.reactant_svg_url, data.reactant);
                 document.getElementById('reactant-name').textContent = data.reactant;
                 
                 // Update product information
-                if (data.product_svg) {
-                    document.getElementById('product-structure').innerHTML = data.product_svg;
+                if (data.product_svg_url) {
+                    document.getElementById('product-structure').innerHTML = structureImage(data.product_svg_url, data.product);
                     document.getElementById('product-name').textContent = data.product;
                 } else {
                     document.getElementById('product-structure').innerHTML = '<div class="alert alert-warning">No product visualization available</div>';
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+# Point every store at a scratch directory before app is imported
+_workdir = tempfile.mkdtemp(prefix='chemreact_tests_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_workdir, 'test.db')
+os.environ['WARMUP'] = 'off'
+os.environ['PREDICT_OFFLOAD'] = 'false'
+os.environ['HISTORY_WRITE_BEHIND'] = 'false'
+os.environ['RESPONSE_CACHE_PATH'] = ''
+os.environ['RESULT_TOKEN_PATH'] = ''
+os.environ['DEPICTION_INDEX_PATH'] = ''
+os.environ['SIMILARITY_INDEX_DIR'] = os.path.join(_workdir, 'similarity')
+os.environ.pop('SVG_CACHE_DIR', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def app_db():
+    """A fresh Reaction table inside an application context"""
+    from app import app, create_tables, db
+    import models
+    assert create_tables()
+    with app.app_context():
+        db.session.query(models.Reaction).delete()
+        db.session.commit()
+        yield db
+        db.session.rollback()
@@ -0,0 +1,24 @@
+import app as app_module
+
+
+def _predict_and_save(client):
+    result = client.post('/predict', data={
+        'compound': 'ethanol', 'catalyst': 'kmno4', 'reaction_type': 'oxidation'}).get_json()
+    return client.post('/history/save', data={'result_token': result['result_token']}).get_json()
+
+
+def test_save_reports_database_errors(app_db, monkeypatch):
+    def fail(rows, dedupe=True):
+        raise RuntimeError('no such table: reaction')
+    monkeypatch.setattr('models.save_reactions', fail)
+
+    response = _predict_and_save(app_module.app.test_client())
+
+    assert response['success'] is False
+    assert 'could not be saved' in response['error']
+
+
+def test_save_succeeds(app_db):
+    import models
+    assert _predict_and_save(app_module.app.test_client()) == {'success': True}
+    assert models.Reaction.query.count() == 1
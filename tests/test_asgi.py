@@ -0,0 +1,45 @@
+import asyncio
+import gzip
+import json
+
+import asgi
+import models
+
+
+def _call(scope, body_parts):
+    """Run one request through the bridge; returns (status, body bytes)"""
+    messages = [{'type': 'http.request', 'body': part, 'more_body': i < len(body_parts) - 1}
+                for i, part in enumerate(body_parts)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app(dict({'type': 'http', 'query_string': b'', 'headers': []}, **scope), receive, send))
+    return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_chunked_post_reaches_the_form():
+    # No content-length header: the body arrives in pieces, as with Transfer-Encoding: chunked
+    form = b'compound=ethanol&catalyst=kmno4&reaction_type=oxidation'
+    status, body = _call({'method': 'POST', 'path': '/predict', 'headers': [
+        (b'content-type', b'application/x-www-form-urlencoded')]}, [form[:10], form[10:30], form[30:]])
+
+    assert status == 200
+    assert json.loads(body)['product'] == 'CC(=O)O'
+
+
+def test_streamed_export_keeps_its_app_context(app_db):
+    models.save_reactions([dict(reactant='CCO', reactant_smiles='CCO', catalyst='kmno4', reaction_type='oxidation',
+                                product='CC(=O)O', product_smiles='CC(=O)O', details='',
+                                created_at=models.datetime(2026, 1, 1), content_hash=str(i)) for i in range(50)],
+                          dedupe=False)
+    app_db.session.commit()
+
+    for _ in range(20):
+        status, body = _call({'method': 'GET', 'path': '/history/export', 'query_string': b'format=csv.gz'}, [b''])
+        assert status == 200
+        assert len(gzip.decompress(body).decode('utf-8').splitlines()) == 51
@@ -0,0 +1,24 @@
+import app as app_module
+import depictions
+
+
+def test_depiction_urls_render_without_the_index():
+    client = app_module.app.test_client()
+    result = client.post('/predict', data={
+        'compound': 'OCC1CCCCC1', 'catalyst': 'kmno4', 'reaction_type': 'oxidation'}).get_json()
+    # Another instance has never seen this id (the tests run without a shared index store)
+    depictions.DEPICTION_INDEX.clear()
+
+    response = client.get(result['product_svg_url'])
+
+    assert response.status_code == 200
+    assert response.data.lstrip().startswith(b'<svg')
+
+
+def test_depiction_smiles_must_match_the_id():
+    key = depictions.depiction_id('CCO')
+    depictions.DEPICTION_INDEX.clear()
+
+    response = app_module.app.test_client().get(f'/depict/{key}.svg', query_string={'smiles': 'CCCO'})
+
+    assert response.status_code == 404
@@ -0,0 +1,27 @@
+import time
+
+import guardrails
+import metrics
+
+
+def test_slow_depiction_is_abandoned_at_the_budget(monkeypatch):
+    monkeypatch.setattr(guardrails, 'DEPICTION_TIME_BUDGET', 0.05)
+    before = guardrails.get_rejection_stats().get('depiction_slow', 0)
+
+    started = time.perf_counter()
+    result = guardrails.timed_depiction('C' * 30, lambda: time.sleep(0.5) or '<svg/>')
+
+    assert result is None
+    assert time.perf_counter() - started < 0.4
+    assert guardrails.get_rejection_stats()['depiction_slow'] == before + 1
+    assert not guardrails.can_depict('C' * 30)
+
+
+def test_fast_depiction_returns_the_drawing():
+    assert guardrails.timed_depiction('CCO', lambda: '<svg/>') == '<svg/>'
+
+
+def test_rejections_are_replayed_from_pool_processes():
+    _, observations = metrics.run_captured(guardrails.admission_error, 'C' * 1000)
+
+    assert ('chemreact_rejections_total', 1, {'reason': 'length'}) in observations
@@ -0,0 +1,24 @@
+import history_export
+import models
+
+
+def _exported_row(reactant, catalyst='kmno4', reaction_type='oxidation'):
+    # What an export of a legacy or HISTORY_DEDUPE=false row looks like
+    return {'reactant': reactant, 'reactant_smiles': '', 'catalyst': catalyst, 'reaction_type': reaction_type,
+            'product': '', 'product_smiles': '', 'details': '', 'created_at': '2026-01-01T00:00:00',
+            'content_hash': '', 'hit_count': '1', 'last_seen_at': ''}
+
+
+def test_import_hashes_rows_by_resolved_reactant(app_db):
+    rows = [_exported_row(reactant) for reactant in ('CCCO', 'CC(O)CC', 'OCC1CCCCC1')]
+
+    assert history_export.import_rows(app_db, rows) == 3
+    assert history_export.import_rows(app_db, rows) == 0
+    assert models.Reaction.query.count() == 3
+
+
+def test_import_without_dedupe_keeps_repeat_rows(app_db):
+    rows = [_exported_row('CCCO')] * 3
+
+    assert history_export.import_rows(app_db, rows, dedupe=False) == 3
+    assert models.Reaction.query.filter(models.Reaction.content_hash.is_(None)).count() == 3
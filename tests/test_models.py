@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import models
+
+
+def _legacy_row(reactant, catalyst='kmno4', reaction_type='oxidation', days=0, reactant_smiles=None):
+    # Free-form input used to be saved without reactant_smiles or a content hash
+    return models.Reaction(reactant=reactant, reactant_smiles=reactant_smiles, catalyst=catalyst,
+                           reaction_type=reaction_type, product='', product_smiles=None, details='',
+                           created_at=datetime(2026, 1, 1) + timedelta(days=days))
+
+
+def _commit_legacy(db):
+    # Columns added by the migration start out NULL, unlike the model defaults
+    db.session.commit()
+    db.session.query(models.Reaction).update({'hit_count': None, 'last_seen_at': None})
+    db.session.commit()
+
+
+def test_backfill_keeps_rows_without_reactant_smiles(app_db):
+    for days, reactant in enumerate(['CCCO', 'CC(O)CC', 'OCC1CCCCC1', 'not a molecule((']):
+        app_db.session.add(_legacy_row(reactant, days=days))
+    _commit_legacy(app_db)
+
+    hashed, merged = models.backfill_content_hashes(app_db.session)
+
+    rows = models.Reaction.query.order_by(models.Reaction.id).all()
+    assert (hashed, merged) == (3, 0)
+    assert [row.reactant for row in rows] == ['CCCO', 'CC(O)CC', 'OCC1CCCCC1', 'not a molecule((']
+    assert len({row.content_hash for row in rows[:3]}) == 3
+    assert rows[3].content_hash is None
+
+
+def test_backfill_merges_spellings_of_one_structure(app_db):
+    app_db.session.add(_legacy_row('propanol', reactant_smiles='CCCO', days=0))
+    app_db.session.add(_legacy_row('OCCC', days=2))
+    app_db.session.add(_legacy_row('CCCO', catalyst='h2so4', reaction_type='dehydration', days=1))
+    _commit_legacy(app_db)
+
+    hashed, merged = models.backfill_content_hashes(app_db.session)
+
+    rows = models.Reaction.query.order_by(models.Reaction.id).all()
+    assert (hashed, merged) == (2, 1)
+    assert [(row.reactant, row.hit_count) for row in rows] == [('propanol', 2), ('CCCO', 1)]
+    assert rows[0].created_at == datetime(2026, 1, 1)
+    assert rows[0].last_seen_at == datetime(2026, 1, 3)